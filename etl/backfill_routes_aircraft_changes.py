@@ -61,7 +61,12 @@ Schema assumptions (from the DB):
     changed_at              timestamp
 """
 
+import io
 import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
 from sqlalchemy import create_engine, text
 
 
@@ -82,11 +87,37 @@ ENGINE = create_engine(get_db_url(), future=True, pool_pre_ping=True)
 # 1. ROUTES
 # -------------------------------------------------------------------
 
+@lru_cache(maxsize=1)
+def airport_coordinates() -> dict:
+    """
+    Fetch (latitude, longitude) per airport_id once per process.
+
+    Airport coordinates are static reference data, so any distance work in
+    this run (route backfills, incremental updates) can reuse the dict
+    instead of re-joining airline.airports in SQL each time.
+    """
+    with ENGINE.begin() as con:
+        rows = con.execute(
+            text(
+                """
+                SELECT airport_id, latitude, longitude
+                FROM airline.airports
+                WHERE latitude IS NOT NULL
+                  AND longitude IS NOT NULL;
+                """
+            )
+        ).all()
+    return {r[0]: (float(r[1]), float(r[2])) for r in rows}
+
+
 def backfill_routes_from_flights(compute_distance: bool = False) -> None:
     """Insert missing routes based on distinct flights."""
 
     print("🔹 Backfilling airline.routes from airline.flights ...")
 
+    # The uq_routes unique constraint already guards against duplicates, so
+    # dedupe via ON CONFLICT instead of an anti-join — one scan of flights,
+    # no flights×routes hash join.
     insert_sql = text(
         """
         INSERT INTO airline.routes (
@@ -101,14 +132,11 @@ def backfill_routes_from_flights(compute_distance: bool = False) -> None:
             f.destination_airport_id,
             NULL::integer AS distance_nm
         FROM airline.flights f
-        LEFT JOIN airline.routes r
-          ON r.airline_id          = f.airline_id
-         AND r.origin_airport_id   = f.origin_airport_id
-         AND r.destination_airport_id = f.destination_airport_id
-        WHERE r.route_id IS NULL
-          AND f.airline_id IS NOT NULL
+        WHERE f.airline_id IS NOT NULL
           AND f.origin_airport_id IS NOT NULL
-          AND f.destination_airport_id IS NOT NULL;
+          AND f.destination_airport_id IS NOT NULL
+        ON CONFLICT (airline_id, origin_airport_id, destination_airport_id)
+        DO NOTHING;
         """
     )
 
@@ -125,66 +153,205 @@ def compute_route_distances() -> None:
     Compute approximate great-circle distance in nautical miles for each route.
 
     Uses airline.airports.latitude / longitude (degrees).
+
+    The Haversine math runs client-side in NumPy: we fetch every route still
+    missing distance_nm in one SELECT, resolve endpoint coordinates through
+    the cached airport dict, compute all distances in a handful of vectorized
+    array ops, and push the results back through a temp table joined on
+    route_id. This keeps the trig out of the Postgres executor, which would
+    otherwise evaluate it row-by-row.
     """
 
     print("🔹 Computing distance_nm for airline.routes ...")
 
+    fetch_sql = """
+        SELECT route_id, origin_airport_id, destination_airport_id
+        FROM airline.routes
+        WHERE distance_nm IS NULL;
+    """
+
+    with ENGINE.begin() as con:
+        df = pd.read_sql(text(fetch_sql), con)
+
+        if df.empty:
+            print("  ➜ No routes missing distance_nm")
+            return
+
+        # Resolve coordinates via the cached dict (no double airports join)
+        coords = airport_coordinates()
+        origin = df["origin_airport_id"].map(coords)
+        dest = df["destination_airport_id"].map(coords)
+
+        known = origin.notna() & dest.notna()
+        df = df[known]
+        if df.empty:
+            print("  ➜ No routes with known endpoint coordinates")
+            return
+
+        o = np.array(origin[known].tolist(), dtype=float)
+        d = np.array(dest[known].tolist(), dtype=float)
+
+        # Vectorized Haversine (degrees -> radians once, then pure ufuncs)
+        lat1 = np.radians(o[:, 0])
+        lon1 = np.radians(o[:, 1])
+        lat2 = np.radians(d[:, 0])
+        lon2 = np.radians(d[:, 1])
+
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+        # 6371 km earth radius, 1.852 km per nautical mile
+        d_nm = (2 * 6371.0 / 1.852) * np.arcsin(np.sqrt(a))
+
+        out = pd.DataFrame(
+            {
+                "route_id": df["route_id"].to_numpy(),
+                "distance_nm": np.rint(d_nm).astype("int64"),
+            }
+        )
+
+        con.execute(
+            text(
+                """
+                CREATE TEMP TABLE tmp_route_dist(
+                    route_id BIGINT,
+                    distance_nm INT
+                ) ON COMMIT DROP;
+                """
+            )
+        )
+        out.to_sql("tmp_route_dist", con, if_exists="append", index=False, method="multi")
+
+        result = con.execute(
+            text(
+                """
+                UPDATE airline.routes r
+                SET distance_nm = t.distance_nm
+                FROM tmp_route_dist t
+                WHERE r.route_id = t.route_id;
+                """
+            )
+        )
+        print(f"  ➜ Updated distance_nm for {result.rowcount or 0} routes")
+
+
+def compute_route_distances_sql() -> None:
+    """
+    Server-side alternative to compute_route_distances().
+
+    Uses the `earthdistance` extension's ll_to_earth()/earth_distance()
+    (implemented in C) instead of pulling coordinates client-side — handy
+    when running ad-hoc from psql or when pandas/NumPy aren't around.
+    Requires the `cube` and `earthdistance` extensions.
+    """
+
+    print("🔹 Computing distance_nm for airline.routes (earthdistance) ...")
+
     update_sql = text(
         """
         UPDATE airline.routes r
-        SET distance_nm = sub.distance_nm::integer
-        FROM (
-            SELECT
-                r2.route_id,
-                (
-                    2 * 6371 * asin(
-                        sqrt(
-                            sin(radians(ad.latitude - ao.latitude) / 2)^2 +
-                            cos(radians(ao.latitude)) *
-                            cos(radians(ad.latitude)) *
-                            sin(radians(ad.longitude - ao.longitude) / 2)^2
-                        )
-                    ) / 1.852
-                ) AS distance_nm
-            FROM airline.routes r2
-            JOIN airline.airports ao
-              ON ao.airport_id = r2.origin_airport_id
-            JOIN airline.airports ad
-              ON ad.airport_id = r2.destination_airport_id
-            WHERE r2.distance_nm IS NULL
-              AND ao.latitude IS NOT NULL
-              AND ao.longitude IS NOT NULL
-              AND ad.latitude IS NOT NULL
-              AND ad.longitude IS NOT NULL
-        ) AS sub
-        WHERE r.route_id = sub.route_id;
+        SET distance_nm = (
+                earth_distance(
+                    ll_to_earth(ao.latitude, ao.longitude),
+                    ll_to_earth(ad.latitude, ad.longitude)
+                ) / 1852.0
+            )::integer
+        FROM airline.airports ao,
+             airline.airports ad
+        WHERE ao.airport_id = r.origin_airport_id
+          AND ad.airport_id = r.destination_airport_id
+          AND r.distance_nm IS NULL
+          AND ao.latitude IS NOT NULL
+          AND ao.longitude IS NOT NULL
+          AND ad.latitude IS NOT NULL
+          AND ad.longitude IS NOT NULL;
         """
     )
 
     with ENGINE.begin() as con:
+        con.execute(text("CREATE EXTENSION IF NOT EXISTS cube;"))
+        con.execute(text("CREATE EXTENSION IF NOT EXISTS earthdistance;"))
         result = con.execute(update_sql)
         print(f"  ➜ Updated distance_nm for {result.rowcount or 0} routes")
 
 
 def backfill_route_ids_on_flights() -> None:
-    """Update airline.flights.route_id to match airline.routes."""
+    """
+    Update airline.flights.route_id to match airline.routes.
+
+    The routes table is small, so it's loaded once into a Python dict keyed
+    by (airline_id, origin, destination); flights missing a route_id stream
+    through a server-side cursor, get resolved via the dict, and the
+    (flight_id, route_id) pairs COPY into a temp table for one single-column
+    UPDATE — cheaper than a 3-column hash join across the whole flights
+    table.
+    """
 
     print("🔹 Backfilling flights.route_id from routes ...")
 
-    update_sql = text(
-        """
-        UPDATE airline.flights f
-        SET route_id = r.route_id
-        FROM airline.routes r
-        WHERE f.route_id IS NULL
-          AND f.airline_id        = r.airline_id
-          AND f.origin_airport_id = r.origin_airport_id
-          AND f.destination_airport_id = r.destination_airport_id;
-        """
-    )
-
     with ENGINE.begin() as con:
-        result = con.execute(update_sql)
+        routes_map = {
+            (a, o, d): rid
+            for rid, a, o, d in con.execute(
+                text(
+                    """
+                    SELECT route_id, airline_id, origin_airport_id, destination_airport_id
+                    FROM airline.routes;
+                    """
+                )
+            )
+        }
+        if not routes_map:
+            print("  ➜ No routes to match against")
+            return
+
+        flights = con.execution_options(stream_results=True).execute(
+            text(
+                """
+                SELECT flight_id, airline_id, origin_airport_id, destination_airport_id
+                FROM airline.flights
+                WHERE route_id IS NULL;
+                """
+            )
+        )
+
+        buf = io.StringIO()
+        n_pairs = 0
+        for fid, a, o, d in flights:
+            rid = routes_map.get((a, o, d))
+            if rid is not None:
+                buf.write(f"{fid},{rid}\n")
+                n_pairs += 1
+
+        if not n_pairs:
+            print("  ➜ No flights needed a route_id")
+            return
+
+        con.execute(
+            text(
+                """
+                CREATE TEMP TABLE tmp_fr(
+                    flight_id BIGINT,
+                    route_id BIGINT
+                ) ON COMMIT DROP;
+                """
+            )
+        )
+        buf.seek(0)
+        con.connection.cursor().copy_expert(
+            "COPY tmp_fr (flight_id, route_id) FROM STDIN WITH CSV", buf
+        )
+
+        result = con.execute(
+            text(
+                """
+                UPDATE airline.flights f
+                SET route_id = t.route_id
+                FROM tmp_fr t
+                WHERE f.flight_id = t.flight_id;
+                """
+            )
+        )
         print(f"  ➜ Updated route_id on {result.rowcount or 0} flights")
 
 
@@ -228,114 +395,175 @@ def backfill_aircraft() -> None:
         print(f"  ➜ Inserted {result.rowcount or 0} aircraft rows")
 
 
-def assign_aircraft_to_flights() -> None:
+def assign_aircraft_to_flights(batch_size: int = 10_000) -> None:
     """
     Assign an aircraft_id to each flight, picking randomly from all aircraft.
     (aircraft is not tied to a specific airline in your schema.)
+
+    Picks are drawn client-side in one vectorized NumPy call (PCG64) rather
+    than N Postgres random() evaluations, then written back in batches of
+    `batch_size` via UPDATE ... FROM (VALUES ...) so no single statement has
+    to rewrite the whole flights table at once.
     """
 
     print("🔹 Assigning aircraft_id to flights ...")
 
-    update_sql = text(
-        """
-        WITH choices AS (
-            SELECT
-                f.flight_id,
-                (
-                  SELECT ac2.aircraft_id
-                  FROM airline.aircraft ac2
-                  ORDER BY random()
-                  LIMIT 1
-                ) AS aircraft_id
-            FROM airline.flights f
-            WHERE f.aircraft_id IS NULL
+    with ENGINE.begin() as con:
+        flight_ids = np.array(
+            con.execute(
+                text("SELECT flight_id FROM airline.flights WHERE aircraft_id IS NULL")
+            ).scalars().all(),
+            dtype=np.int64,
+        )
+        aircraft_ids = np.array(
+            con.execute(text("SELECT aircraft_id FROM airline.aircraft")).scalars().all(),
+            dtype=np.int64,
         )
-        UPDATE airline.flights f
-        SET aircraft_id = c.aircraft_id
-        FROM choices c
-        WHERE f.flight_id = c.flight_id;
-        """
-    )
 
-    with ENGINE.begin() as con:
-        result = con.execute(update_sql)
-        print(f"  ➜ Updated aircraft_id on {result.rowcount or 0} flights")
+        if flight_ids.size == 0 or aircraft_ids.size == 0:
+            print("  ➜ Nothing to assign (no unassigned flights or no aircraft)")
+            return
+
+        rng = np.random.default_rng(42)
+        picks = aircraft_ids[rng.integers(0, aircraft_ids.size, size=flight_ids.size)]
+
+        updated = 0
+        for start in range(0, flight_ids.size, batch_size):
+            fids = flight_ids[start : start + batch_size]
+            aids = picks[start : start + batch_size]
+            values = ", ".join(f"({f}, {a})" for f, a in zip(fids, aids))
+            result = con.execute(
+                text(
+                    f"""
+                    UPDATE airline.flights f
+                    SET aircraft_id = v.aircraft_id
+                    FROM (VALUES {values}) AS v(flight_id, aircraft_id)
+                    WHERE f.flight_id = v.flight_id;
+                    """
+                )
+            )
+            updated += result.rowcount or 0
+
+        print(f"  ➜ Updated aircraft_id on {updated} flights")
 
 
 # -------------------------------------------------------------------
 # 3. FLIGHT_CHANGES
 # -------------------------------------------------------------------
 
+CHANGE_REASONS = np.array(
+    ["Maintenance", "Crew Reassignment", "Operational", "Equipment Downgrade"]
+)
+
+
 def generate_flight_changes(change_fraction: float = 0.05) -> None:
     """
     Create synthetic aircraft change events for a subset of flights.
 
     change_fraction: approximate fraction of flights to get a change row.
+
+    Sampling, replacement-aircraft picks, reason picks, and changed_at
+    jitter all happen client-side with NumPy's PCG64 generator — one
+    vectorized draw each instead of a random()/array-index expression per
+    candidate row in SQL. The rows land in a temp table and are applied
+    with the same fused INSERT ... RETURNING + UPDATE as before.
     """
 
     print(f"🔹 Generating flight_changes for ~{change_fraction*100:.1f}% of flights ...")
 
-    insert_sql = text(
-        f"""
-        WITH candidate_flights AS (
-            SELECT f.flight_id, f.aircraft_id, f.flight_date
-            FROM airline.flights f
-            WHERE f.aircraft_id IS NOT NULL
-        ),
-        sampled AS (
-            SELECT *
-            FROM candidate_flights
-            WHERE random() < {change_fraction}
-        ),
-        new_aircraft AS (
-            SELECT
-                s.flight_id,
-                s.aircraft_id AS original_aircraft_id,
-                s.flight_date,
-                (
-                  SELECT ac2.aircraft_id
-                  FROM airline.aircraft ac2
-                  WHERE ac2.aircraft_id <> s.aircraft_id
-                  ORDER BY random()
-                  LIMIT 1
-                ) AS new_aircraft_id
-            FROM sampled s
+    with ENGINE.begin() as con:
+        flights = pd.read_sql(
+            text(
+                """
+                SELECT flight_id, aircraft_id, flight_date
+                FROM airline.flights
+                WHERE aircraft_id IS NOT NULL;
+                """
+            ),
+            con,
         )
-        INSERT INTO airline.flight_changes (
-            flight_id,
-            old_aircraft_id,
-            new_aircraft_id,
-            reason,
-            changed_at
+        aircraft_ids = np.sort(
+            np.array(
+                con.execute(text("SELECT aircraft_id FROM airline.aircraft")).scalars().all(),
+                dtype=np.int64,
+            )
         )
-        SELECT
-            n.flight_id,
-            n.original_aircraft_id,
-            n.new_aircraft_id,
-            (ARRAY['Maintenance','Crew Reassignment','Operational','Equipment Downgrade'])[1 + floor(random()*4)]::text,
-            n.flight_date::timestamp - INTERVAL '2 hours' + (random() * INTERVAL '90 minutes')
-        FROM new_aircraft n
-        WHERE n.new_aircraft_id IS NOT NULL;
-        """
-    )
 
-    with ENGINE.begin() as con:
-        result = con.execute(insert_sql)
-        print(f"  ➜ Inserted {result.rowcount or 0} flight_changes rows")
+        if flights.empty or aircraft_ids.size < 2:
+            print("  ➜ Not enough flights/aircraft to generate changes")
+            return
+
+        rng = np.random.default_rng(42)
+        sampled = flights[rng.random(len(flights)) < change_fraction]
+        n = len(sampled)
+        if n == 0:
+            print("  ➜ Sample came up empty, nothing to do")
+            return
+
+        # Replacement aircraft: draw an index into the fleet minus one slot,
+        # then shift past the old aircraft's position so new != old.
+        old = sampled["aircraft_id"].to_numpy(np.int64)
+        old_pos = np.searchsorted(aircraft_ids, old)
+        draw = rng.integers(0, aircraft_ids.size - 1, size=n)
+        new = aircraft_ids[np.where(draw >= old_pos, draw + 1, draw)]
+
+        reasons = CHANGE_REASONS[rng.integers(0, CHANGE_REASONS.size, size=n)]
+        changed_at = (
+            pd.to_datetime(sampled["flight_date"]).to_numpy().astype("datetime64[m]")
+            - np.timedelta64(120, "m")
+            + rng.integers(0, 90, size=n).astype("timedelta64[m]")
+        )
 
-    # Optionally: update flights.aircraft_id to reflect the "new" aircraft
-    update_sql = text(
-        """
-        UPDATE airline.flights f
-        SET aircraft_id = fc.new_aircraft_id
-        FROM airline.flight_changes fc
-        WHERE fc.flight_id = f.flight_id;
-        """
-    )
+        out = pd.DataFrame(
+            {
+                "flight_id": sampled["flight_id"].to_numpy(np.int64),
+                "old_aircraft_id": old,
+                "new_aircraft_id": new,
+                "reason": reasons,
+                "changed_at": changed_at,
+            }
+        )
 
-    with ENGINE.begin() as con:
-        result = con.execute(update_sql)
-        print(f"  ➜ Updated aircraft_id on {result.rowcount or 0} flights to match flight_changes")
+        con.execute(
+            text(
+                """
+                CREATE TEMP TABLE tmp_fc(
+                    flight_id BIGINT,
+                    old_aircraft_id BIGINT,
+                    new_aircraft_id BIGINT,
+                    reason TEXT,
+                    changed_at TIMESTAMP
+                ) ON COMMIT DROP;
+                """
+            )
+        )
+        out.to_sql("tmp_fc", con, if_exists="append", index=False, method="multi")
+
+        result = con.execute(
+            text(
+                """
+                WITH ins AS (
+                    INSERT INTO airline.flight_changes (
+                        flight_id,
+                        old_aircraft_id,
+                        new_aircraft_id,
+                        reason,
+                        changed_at
+                    )
+                    SELECT flight_id, old_aircraft_id, new_aircraft_id, reason, changed_at
+                    FROM tmp_fc
+                    RETURNING flight_id, new_aircraft_id
+                )
+                -- Move flights onto the "new" aircraft in the same statement,
+                -- so only the rows that actually changed get rewritten.
+                UPDATE airline.flights f
+                SET aircraft_id = ins.new_aircraft_id
+                FROM ins
+                WHERE f.flight_id = ins.flight_id;
+                """
+            )
+        )
+        print(f"  ➜ Recorded + applied aircraft changes on {result.rowcount or 0} flights")
 
 
 # -------------------------------------------------------------------
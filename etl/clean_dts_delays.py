@@ -1,40 +1,64 @@
-import pandas as pd
-from pathlib import Path
-
-# Load raw CSV
-df = pd.read_csv(Path("/Users/gracepolito/Desktop/Master of Data Science/691 Applied Data Science/Airline Business Intelligence Database/data/bts_flights_2024.csv"))
-
-# Normalize column names
-df.columns = df.columns.str.lower().str.strip()
-
-# Keep only needed fields
-cols = [
-    "year", "month", "carrier", "carrier_name", "airport", "airport_name",
-    "arr_flights", "arr_del15", "arr_cancelled", "arr_diverted",
-    "arr_delay", "carrier_delay", "weather_delay", "nas_delay", "security_delay", "late_aircraft_delay"
-]
-df = df[cols]
-
-# Rename columns for DB consistency
-df = df.rename(columns={
-    "carrier": "airline_iata",
-    "airport": "airport_iata",
-    "arr_flights": "arrivals",
-    "arr_del15": "arrivals_delayed_15min",
-    "arr_delay": "total_arrival_delay_min"
-})
-
-# Fill NaNs with 0 for numeric delay values
-num_cols = [c for c in df.columns if "delay" in c or "arrivals" in c]
-df[num_cols] = df[num_cols].fillna(0)
-
-# Add a unique key for loading
-df["snapshot_id"] = (
-    df["year"].astype(str) + "_" +
-    df["month"].astype(str).str.zfill(2) + "_" +
-    df["airline_iata"] + "_" + df["airport_iata"]
-)
-
-# Export cleaned version
-df.to_csv("/Users/gracepolito/Desktop/Master of Data Science/691 Applied Data Science/Airline Business Intelligence Database/data/bts_cleaned.csv", index=False)
-print("✅ Cleaned data saved to data/bts_cleaned.csv")
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+RAW_CSV = "/Users/gracepolito/Desktop/Master of Data Science/691 Applied Data Science/Airline Business Intelligence Database/data/bts_flights_2024.csv"
+OUT_CSV = "/Users/gracepolito/Desktop/Master of Data Science/691 Applied Data Science/Airline Business Intelligence Database/data/bts_cleaned.csv"
+
+
+def process(raw_csv: str) -> pa.Table:
+    """
+    Clean the raw BTS delay CSV into the bts_cleaned layout, as an Arrow
+    Table. load_bts_performance can call this directly and skip the
+    intermediate CSV round-trip entirely.
+    """
+    # Load raw CSV with Arrow's C parser (no per-cell Python objects)
+    table = pv.read_csv(raw_csv)
+
+    # Normalize column names
+    table = table.rename_columns([c.lower().strip() for c in table.column_names])
+
+    # Keep only needed fields
+    cols = [
+        "year", "month", "carrier", "carrier_name", "airport", "airport_name",
+        "arr_flights", "arr_del15", "arr_cancelled", "arr_diverted",
+        "arr_delay", "carrier_delay", "weather_delay", "nas_delay", "security_delay", "late_aircraft_delay"
+    ]
+    table = table.select(cols)
+
+    # Rename columns for DB consistency
+    rename = {
+        "carrier": "airline_iata",
+        "airport": "airport_iata",
+        "arr_flights": "arrivals",
+        "arr_del15": "arrivals_delayed_15min",
+        "arr_delay": "total_arrival_delay_min",
+    }
+    table = table.rename_columns([rename.get(c, c) for c in table.column_names])
+
+    # Fill nulls with 0 for numeric delay values (columnar kernel, no copies
+    # of the whole table)
+    num_cols = [c for c in table.column_names if "delay" in c or "arrivals" in c]
+    for c in num_cols:
+        i = table.column_names.index(c)
+        table = table.set_column(i, c, pc.fill_null(table[c], 0))
+
+    # Add a unique key for loading: year_MM_airline_airport
+    snapshot_id = pc.binary_join_element_wise(
+        pc.cast(table["year"], pa.string()),
+        pc.utf8_lpad(pc.cast(table["month"], pa.string()), 2, "0"),
+        table["airline_iata"],
+        table["airport_iata"],
+        "_",
+    )
+    return table.append_column("snapshot_id", snapshot_id)
+
+
+def main() -> None:
+    # Export cleaned version (Arrow writes CSV in C as well)
+    pv.write_csv(process(RAW_CSV), OUT_CSV)
+    print("✅ Cleaned data saved to data/bts_cleaned.csv")
+
+
+if __name__ == "__main__":
+    main()
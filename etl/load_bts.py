@@ -1,21 +1,25 @@
 
 # etl/load_bts.py
-import os, pandas as pd
+import io, os, pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
 load_dotenv()
-engine = create_engine(os.environ["AIRLINE_DB_DSN"], pool_pre_ping=True)
+# execute_values-backed executemany for anything not going through COPY
+engine = create_engine(
+    os.environ["AIRLINE_DB_DSN"],
+    pool_pre_ping=True,
+    executemany_mode="values_plus_batch",
+)
+
+CHUNK = 100_000
 
 def clean_str(s):
     if pd.isna(s): return None
     s = str(s).strip()
     return s or None
 
-def run():
-    # Start with a small subset CSV (1–3 months)
-    bts = pd.read_csv("data/bts_flights_2024Q1.csv")
-
+def clean_chunk(bts):
     # Map common BTS columns -> normalized names
     rename_map = {
         "MKT_UNIQUE_CARRIER":"airline_code",
@@ -39,13 +43,26 @@ def run():
     bts["flight_date"] = pd.to_datetime(bts["flight_date"], errors="coerce").dt.date
     for col in ["sched_dep_utc","sched_arr_utc","actual_dep_utc","actual_arr_utc"]:
         if col in bts.columns: bts[col] = pd.to_datetime(bts[col], errors="coerce")
-    bts["delay_minutes"] = pd.to_numeric(bts.get("delay_minutes"), errors="coerce")
+    # ARR_DELAY arrives float-formatted (and NaN for cancelled flights);
+    # COPY can't parse "12.0" into tmp_bts.delay_minutes int, so round
+    # into nullable Int64 — NA serializes as an empty field, which CSV
+    # COPY reads back as NULL.
+    bts["delay_minutes"] = (
+        pd.to_numeric(bts.get("delay_minutes"), errors="coerce").round().astype("Int64")
+    )
     # Normalize status
     if "cancelled" in bts.columns:
         bts["status"] = bts["cancelled"].map({1:"Cancelled", 0:"Arrived"})
     bts["status"] = bts["status"].fillna("Scheduled")
+    return bts
+
+def run():
+    # Start with a small subset CSV (1–3 months)
+    reader = pd.read_csv("data/bts_flights_2024Q1.csv", chunksize=CHUNK)
 
     with engine.begin() as con:
+        # keep the staging table in local buffers for the joins below
+        con.execute(text("SET LOCAL temp_buffers = '64MB';"))
         con.execute(text("""
             CREATE TEMP TABLE tmp_bts(
               airline_code text,
@@ -62,14 +79,10 @@ def run():
             ) ON COMMIT DROP;
         """))
 
-        cols = ["airline_code","flight_number","flight_date","origin_iata","dest_iata",
-                "sched_dep_utc","sched_arr_utc","actual_dep_utc","actual_arr_utc",
-                "delay_minutes","status"]
-        # keep only existing columns
-        cols = [c for c in cols if c in bts.columns]
-        bts[cols].to_sql("tmp_bts", con, index=False, if_exists="append")
-
+        # Prepare the big upsert once per connection; each chunk then only
+        # pays EXECUTE, not a fresh parse/plan of the 4-join statement.
         con.execute(text("""
+            PREPARE ins_flights_from_tmp AS
             INSERT INTO airline.flights(
               airline_id, aircraft_id, route_id,
               origin_airport_id, destination_airport_id,
@@ -104,6 +117,27 @@ def run():
             ON CONFLICT ON CONSTRAINT uq_flight_instance DO NOTHING;
         """))
 
+        cols_all = ["airline_code","flight_number","flight_date","origin_iata","dest_iata",
+                    "sched_dep_utc","sched_arr_utc","actual_dep_utc","actual_arr_utc",
+                    "delay_minutes","status"]
+
+        for bts in reader:
+            bts = clean_chunk(bts)
+            # keep only existing columns
+            cols = [c for c in cols_all if c in bts.columns]
+            # COPY the chunk instead of multi-row INSERTs via to_sql
+            buf = io.StringIO()
+            bts[cols].to_csv(buf, index=False, header=False)
+            buf.seek(0)
+            cur = con.connection.cursor()
+            cur.copy_expert(f"COPY tmp_bts ({', '.join(cols)}) FROM STDIN WITH CSV", buf)
+
+            # give the planner stats for the three dimension joins
+            con.execute(text("ANALYZE tmp_bts;"))
+
+            con.execute(text("EXECUTE ins_flights_from_tmp;"))
+            con.execute(text("TRUNCATE tmp_bts;"))
+
     print("BTS -> production flights complete.")
 
 if __name__ == "__main__":
@@ -1,7 +1,10 @@
+import io
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine, text
 
@@ -24,11 +27,40 @@ def get_db_url() -> str:
     return url
 
 
-ENGINE = create_engine(get_db_url(), future=True, pool_pre_ping=True)
+# values_plus_batch routes any remaining executemany through psycopg2's
+# execute_values / execute_batch instead of one INSERT round-trip per row.
+# (The big staging loads themselves go through COPY, see copy_into.)
+ENGINE = create_engine(
+    get_db_url(),
+    future=True,
+    pool_pre_ping=True,
+    executemany_mode="values_plus_batch",
+)
 
 
-RAW_PATH = "data/bts_cleaned.csv"        
-CHUNK = 200_000                                
+RAW_PATH = "data/bts_cleaned.csv"
+RAW_BTS_PATH = "data/bts_flights_2024.csv"
+CHUNK = 200_000
+
+
+def iter_raw_chunks():
+    """
+    Yield raw chunks for normalize_chunk.
+
+    Prefers the pre-cleaned CSV if it exists; otherwise cleans the raw BTS
+    file in-memory via clean_dts_delays.process() and slices the Arrow
+    table into CHUNK-sized frames — no intermediate bts_cleaned.csv write
+    + re-parse.
+    """
+    if os.path.exists(RAW_PATH):
+        yield from pd.read_csv(RAW_PATH, chunksize=CHUNK)
+        return
+
+    from clean_dts_delays import process
+
+    table = process(RAW_BTS_PATH)
+    for start in range(0, table.num_rows, CHUNK):
+        yield table.slice(start, CHUNK).to_pandas()
 
 def normalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -107,9 +139,13 @@ def normalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
 
     df = df[keep].copy()
 
-    # Clean IATA codes
-    df["airline_iata"] = df["airline_iata"].astype(str).str.strip().str.upper()
-    df["airport_iata"] = df["airport_iata"].astype(str).str.strip().str.upper()
+    # Clean IATA codes, then store as Categorical: at most a couple
+    # thousand distinct codes per 200k-row chunk, so downstream ops work
+    # on a small categories index instead of per-row strings. Cleaning
+    # happens before categorizing — renaming categories would blow up
+    # whenever two raw codes collapse to the same value ("AA " vs "AA").
+    for c in ("airline_iata", "airport_iata"):
+        df[c] = pd.Categorical(df[c].astype(str).str.strip().str.upper())
 
     # Ensure numeric columns are numeric (fill NaN with 0)
     numeric_cols = [
@@ -124,19 +160,38 @@ def normalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
         "security_delay",
         "late_aircraft_delay",
     ]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
-
-    # Build a snapshot_id that matches your flight_performance PK
-    df["snapshot_id"] = (
-        df["year"].astype(int).astype(str).str.zfill(4)
-        + "-"
-        + df["month"].astype(int).astype(str).str.zfill(2)
-        + "-"
-        + df["airline_iata"]
-        + "-"
-        + df["airport_iata"]
-    )
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors="coerce").fillna(0)
+
+    # bts_cleaned.csv stores the counts as floats ("61.0"), and unlike
+    # the old parameterized INSERTs, COPY applies no assignment cast —
+    # anything bound to an INT stage column must serialize as a bare
+    # integer. fillna(0) above makes the plain int64 cast safe.
+    int_cols = [
+        "year",
+        "month",
+        "arrivals",
+        "arrivals_delayed_15min",
+        "arr_cancelled",
+        "arr_diverted",
+    ]
+    df[int_cols] = df[int_cols].astype("int64")
+
+    # Build a snapshot_id that matches your flight_performance PK.
+    # The natural key is assembled in NumPy fixed-width string arrays —
+    # zero-padded year/month plus the IATA codes — then collapsed to a
+    # deterministic 64-bit hash. The BIGINT key keeps the PK index 8 bytes
+    # wide (vs ~15-byte text); the upsert arbitrates on the uq_fp natural
+    # key, so re-runs stay idempotent even against rows loaded before the
+    # BIGINT migration (whose ids hash differently).
+    yr = np.char.zfill(df["year"].to_numpy(np.int32).astype("U4"), 4)
+    mo = np.char.zfill(df["month"].to_numpy(np.int32).astype("U2"), 2)
+    al = df["airline_iata"].to_numpy(dtype="U5")
+    ap = df["airport_iata"].to_numpy(dtype="U5")
+
+    snapshot = yr
+    for part in (mo, al, ap):
+        snapshot = np.char.add(np.char.add(snapshot, "-"), part)
+    df["snapshot_id"] = pd.util.hash_array(snapshot.astype(object)).astype(np.int64)
 
     # Order columns to match the INSERT INTO tmp_fp
     ordered = [
@@ -159,12 +214,28 @@ def normalize_chunk(df: pd.DataFrame) -> pd.DataFrame:
     return df[ordered]
 
 
+def copy_into(con, df: pd.DataFrame, table: str) -> None:
+    """
+    Bulk-load a DataFrame into `table` with psycopg2 COPY.
+
+    One CSV-formatted stream per chunk instead of multi-row INSERTs —
+    no parameter placeholders to build, and a single round-trip.
+    """
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+
+    cols = ", ".join(df.columns)
+    cur = con.connection.cursor()
+    cur.copy_expert(f"COPY {table} ({cols}) FROM STDIN WITH CSV", buf)
+
+
 def ensure_table():
     with ENGINE.begin() as con:
         con.execute(text("""SET search_path TO airline, public;"""))
         con.execute(text("""
         CREATE TABLE IF NOT EXISTS airline.flight_performance (
-            snapshot_id TEXT PRIMARY KEY,
+            snapshot_id BIGINT PRIMARY KEY,
             year INT NOT NULL,
             month INT NOT NULL,
             airline_iata VARCHAR(5) NOT NULL,
@@ -188,56 +259,84 @@ def ensure_table():
         CREATE INDEX IF NOT EXISTS idx_fp_airport ON airline.flight_performance (airport_iata);
         """))
 
+def upsert_chunk(df: pd.DataFrame) -> None:
+    """COPY one normalized chunk into tmp_fp and upsert it."""
+    with ENGINE.begin() as con:
+        # Size temp_buffers for the 200k-row chunk so tmp_fp stays in
+        # local buffers instead of spilling; LOCAL scopes it to this txn.
+        con.execute(text("SET LOCAL temp_buffers = '64MB';"))
+        # temp table for conflict-safe upsert
+        con.execute(text("""
+            CREATE TEMP TABLE tmp_fp(
+                snapshot_id BIGINT,
+                year INT,
+                month INT,
+                airline_iata VARCHAR(5),
+                airport_iata VARCHAR(5),
+                arrivals INT,
+                arrivals_delayed_15min INT,
+                arr_cancelled INT,
+                arr_diverted INT,
+                total_arrival_delay_min DOUBLE PRECISION,
+                carrier_delay DOUBLE PRECISION,
+                weather_delay DOUBLE PRECISION,
+                nas_delay DOUBLE PRECISION,
+                security_delay DOUBLE PRECISION,
+                late_aircraft_delay DOUBLE PRECISION
+            ) ON COMMIT DROP;
+        """))
+        copy_into(con, df, "tmp_fp")
+
+        # Fresh temp tables have no stats; ANALYZE so the planner picks a
+        # hash join for the airports probe instead of nested loops.
+        con.execute(text("ANALYZE tmp_fp;"))
+
+        con.execute(text("""
+            INSERT INTO airline.flight_performance AS fp(
+                snapshot_id, year, month, airline_iata, airport_iata,
+                arrivals, arrivals_delayed_15min, arr_cancelled, arr_diverted,
+                total_arrival_delay_min, carrier_delay, weather_delay, nas_delay, security_delay, late_aircraft_delay
+            )
+            SELECT
+                t.snapshot_id, t.year, t.month, t.airline_iata, t.airport_iata,
+                t.arrivals, t.arrivals_delayed_15min, t.arr_cancelled, t.arr_diverted,
+                t.total_arrival_delay_min, t.carrier_delay, t.weather_delay,
+                t.nas_delay, t.security_delay, t.late_aircraft_delay
+            FROM tmp_fp t
+            WHERE EXISTS (
+                SELECT 1
+                FROM airline.airports a
+                WHERE a.iata_code = t.airport_iata
+            )
+            ON CONFLICT ON CONSTRAINT uq_fp DO NOTHING;
+        """))
+
+
 def load():
     ensure_table()
 
-    reader = pd.read_csv(RAW_PATH, chunksize=CHUNK)
-    for i, chunk in enumerate(reader, start=1):
-        df = normalize_chunk(chunk)
-
-        with ENGINE.begin() as con:
-            # temp table for conflict-safe upsert
-            con.execute(text("""
-                CREATE TEMP TABLE tmp_fp(
-                    snapshot_id TEXT,
-                    year INT,
-                    month INT,
-                    airline_iata VARCHAR(5),
-                    airport_iata VARCHAR(5),
-                    arrivals INT,
-                    arrivals_delayed_15min INT,
-                    arr_cancelled INT,
-                    arr_diverted INT,
-                    total_arrival_delay_min DOUBLE PRECISION,
-                    carrier_delay DOUBLE PRECISION,
-                    weather_delay DOUBLE PRECISION,
-                    nas_delay DOUBLE PRECISION,
-                    security_delay DOUBLE PRECISION,
-                    late_aircraft_delay DOUBLE PRECISION
-                ) ON COMMIT DROP;
-            """))
-            df.to_sql("tmp_fp", con, if_exists="append", index=False)
-            
-            con.execute(text("""
-                INSERT INTO airline.flight_performance AS fp(
-                    snapshot_id, year, month, airline_iata, airport_iata,
-                    arrivals, arrivals_delayed_15min, arr_cancelled, arr_diverted,
-                    total_arrival_delay_min, carrier_delay, weather_delay, nas_delay, security_delay, late_aircraft_delay
-                )
-                SELECT
-                    t.snapshot_id, t.year, t.month, t.airline_iata, t.airport_iata,
-                    t.arrivals, t.arrivals_delayed_15min, t.arr_cancelled, t.arr_diverted,
-                    t.total_arrival_delay_min, t.carrier_delay, t.weather_delay,
-                    t.nas_delay, t.security_delay, t.late_aircraft_delay
-                FROM tmp_fp t
-                JOIN airline.airports a
-                  ON t.airport_iata = a.iata_code
-                ON CONFLICT (snapshot_id) DO NOTHING;
-            """))
-                 
-    print(f"Chunk {i} inserted.")
-
-print("✅ BTS performance load complete.")
+    reader = iter_raw_chunks()
+
+    # Pipeline the chunks: normalize chunk i+1 on a worker thread while the
+    # main thread COPYs/upserts chunk i, so pandas CPU time hides behind DB
+    # latency instead of adding to it.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = None
+        i = 0
+        for chunk in reader:
+            nxt = pool.submit(normalize_chunk, chunk)
+            if pending is not None:
+                i += 1
+                upsert_chunk(pending.result())
+                print(f"Chunk {i} inserted.")
+            pending = nxt
+
+        if pending is not None:
+            i += 1
+            upsert_chunk(pending.result())
+            print(f"Chunk {i} inserted.")
+
+    print("✅ BTS performance load complete.")
 
 if __name__ == "__main__":
     load()
@@ -14,11 +14,16 @@ Assumes:
   - Flights already exist in airline.flights
 """
 
+import csv
+import io
 import os
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import numpy as np
 from faker import Faker
+from psycopg2.extras import execute_values
 from sqlalchemy import create_engine, text
 
 
@@ -45,12 +50,30 @@ def get_db_url() -> str:
     return url
 
 
-ENGINE = create_engine(get_db_url(), future=True, pool_pre_ping=True)
+# Rewrite parameterized executemany into multi-VALUES pages of 1000 via
+# psycopg2's fast-execution helpers; no call-site changes needed.
+ENGINE = create_engine(
+    get_db_url(),
+    future=True,
+    pool_pre_ping=True,
+    executemany_mode="values_plus_batch",
+    executemany_values_page_size=1000,
+    executemany_batch_page_size=1000,
+)
 
 faker = Faker("en_US")
 Faker.seed(42)
 random.seed(42)
 
+# Pre-sampled pools drawn once at import. Faker's per-call provider
+# dispatch dominates passenger generation; indexing these arrays with
+# vectorized draws is ~free, and a few thousand distinct names is plenty
+# of variety for BI test data.
+FIRST_NAME_POOL = np.array([faker.first_name() for _ in range(2000)])
+LAST_NAME_POOL = np.array([faker.last_name() for _ in range(5000)])
+STATE_POOL = np.array([faker.state_abbr() for _ in range(200)])
+COUNTRY_POOL = np.array([faker.country() for _ in range(200)])
+
 
 # ---------------------------------------------------------------------------
 # Small helpers
@@ -64,17 +87,20 @@ def random_datetime(start_year: int = 2022, end_year: int = 2026) -> datetime:
     return start + timedelta(seconds=offset_seconds)
 
 
+# Bucket edges/labels for age groups; searchsorted maps a whole age array
+# to labels in one C-level pass.
+AGE_EDGES = np.array([26, 36, 46, 61])
+AGE_LABELS = np.array(["18-25", "26-35", "36-45", "46-60", "60+"])
+
+
+def ages_to_groups(ages: np.ndarray) -> np.ndarray:
+    """Vectorized bucketization of an age array into group labels."""
+    return AGE_LABELS[np.searchsorted(AGE_EDGES, ages, side="right")]
+
+
 def age_to_group(age: int) -> str:
-    if age < 26:
-        return "18-25"
-    elif age < 36:
-        return "26-35"
-    elif age < 46:
-        return "36-45"
-    elif age < 61:
-        return "46-60"
-    else:
-        return "60+"
+    """Scalar fallback for one-off use."""
+    return str(ages_to_groups(np.array([age]))[0])
 
 
 # ---------------------------------------------------------------------------
@@ -94,19 +120,50 @@ def fetch_enum_values(conn, enum_name: str):
     return [r[0] for r in rows]
 
 
+def fetch_reference_enums(conn):
+    """
+    Fetch both reference enums in a single round-trip.
+
+    One SELECT returns loyalty_tier and miles_txn_type as arrays, which
+    the driver hands back as Python lists — versus one query per enum.
+    """
+    tiers, txn_types = conn.execute(
+        text(
+            """
+            SELECT
+                (SELECT array_agg(l)
+                 FROM unnest(enum_range(NULL::airline.loyalty_tier)) l),
+                (SELECT array_agg(l)
+                 FROM unnest(enum_range(NULL::airline.miles_txn_type)) l);
+            """
+        )
+    ).one()
+    return list(tiers or []), list(txn_types or [])
+
+
+# Written by synth_flights.py right before this script normally runs
+FLIGHT_IDS_CACHE = "data/.flight_ids.npy"
+
+
 def fetch_flight_ids(conn):
     rows = conn.execute(text("SELECT flight_id FROM airline.flights;")).all()
     return [r[0] for r in rows]
 
 
-def fetch_passenger_ids(conn):
-    rows = conn.execute(text("SELECT passenger_id FROM airline.passengers;")).all()
-    return [r[0] for r in rows]
-
+def load_flight_ids(conn) -> np.ndarray:
+    """
+    Flight ids for the miles-transaction generator.
 
-def fetch_loyalty_ids(conn):
-    rows = conn.execute(text("SELECT loyalty_id FROM airline.loyalty_accounts;")).all()
-    return [r[0] for r in rows]
+    Prefers the id cache synth_flights.py saves after its insert — that
+    skips pulling the whole flights table over the wire — and falls back
+    to the full SELECT when the cache isn't there.
+    """
+    if os.path.exists(FLIGHT_IDS_CACHE):
+        ids = np.load(FLIGHT_IDS_CACHE)
+        if ids.size:
+            print(f"💾 Using {ids.size} cached flight ids from {FLIGHT_IDS_CACHE}")
+            return ids
+    return np.asarray(fetch_flight_ids(conn), dtype=np.int64)
 
 
 # ---------------------------------------------------------------------------
@@ -114,36 +171,60 @@ def fetch_loyalty_ids(conn):
 # ---------------------------------------------------------------------------
 
 def generate_passenger_rows(n: int):
-    genders = ["F", "M", "X"]
-    rows = []
-
-    for _ in range(n):
-        first_name = faker.first_name()
-        last_name = faker.last_name()
-        email = faker.unique.email()
-        gender = random.choice(genders)
-        age = random.randint(18, 80)
-        age_group = age_to_group(age)
-        # US state or country name; it's just text so we can mix
-        if random.random() < 0.7:
-            state_or_country = faker.state_abbr()
-        else:
-            state_or_country = faker.country()
-        created_at = random_datetime(2022, 2024)
+    """
+    Generate n passenger rows column-wise.
 
-        rows.append(
-            {
-                "first_name": first_name,
-                "last_name": last_name,
-                "email": email,
-                "gender": gender,
-                "age_group": age_group,
-                "state_or_country": state_or_country,
-                "created_at": created_at,
-            }
+    Every field is a whole-array draw: names/states index the pre-sampled
+    module pools instead of calling Faker per row, and emails are built
+    from the names plus a running index — unique by construction, without
+    faker.unique's seen-set tracking.
+    """
+    rng = np.random.default_rng(42)
+
+    first_names = FIRST_NAME_POOL[rng.integers(0, FIRST_NAME_POOL.size, n)]
+    last_names = LAST_NAME_POOL[rng.integers(0, LAST_NAME_POOL.size, n)]
+    emails = np.char.lower(
+        np.char.add(
+            np.char.add(np.char.add(first_names, "."), last_names),
+            np.char.add(np.arange(n).astype(str), "@example.com"),
         )
+    )
 
-    return rows
+    genders = np.array(["F", "M", "X"])
+    gender_col = genders[rng.integers(0, genders.size, n)].tolist()
+
+    ages = rng.integers(18, 81, n)
+    age_groups = ages_to_groups(ages).tolist()
+
+    # US state or country name; it's just text so we can mix
+    use_state = rng.random(n) < 0.7
+    states = np.where(
+        use_state,
+        STATE_POOL[rng.integers(0, STATE_POOL.size, n)],
+        COUNTRY_POOL[rng.integers(0, COUNTRY_POOL.size, n)],
+    )
+
+    start = np.datetime64("2022-01-01T00:00:00")
+    end = np.datetime64("2024-12-31T23:59:59")
+    span_s = int((end - start) / np.timedelta64(1, "s"))
+    created = (start + rng.integers(0, span_s + 1, n).astype("timedelta64[s]")).tolist()
+
+    return [
+        {
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email,
+            "gender": gender,
+            "age_group": age_group,
+            "state_or_country": state_or_country,
+            "created_at": created_at,
+        }
+        for first_name, last_name, email, gender, age_group, state_or_country, created_at
+        in zip(
+            first_names.tolist(), last_names.tolist(), emails.tolist(),
+            gender_col, age_groups, states.tolist(), created,
+        )
+    ]
 
 
 def generate_loyalty_rows(passenger_ids, tiers, loyalty_ratio=0.6):
@@ -173,128 +254,185 @@ def generate_loyalty_rows(passenger_ids, tiers, loyalty_ratio=0.6):
 def generate_miles_txn_rows(loyalty_ids, flight_ids, txn_types):
     """
     Generate a handful of miles transactions per loyalty account.
+
+    The nested per-account loop is flattened into whole-array draws:
+    a 1–6 count per account, np.repeat of the loyalty ids by those
+    counts, then one vectorized draw per column over the flat total.
+    The redeem/spend/debit sign heuristic runs once per enum label
+    instead of once per transaction.
     """
-    if not loyalty_ids or not flight_ids or not txn_types:
+    if len(loyalty_ids) == 0 or len(flight_ids) == 0 or not txn_types:
         return []
 
-    rows = []
-    for lid in loyalty_ids:
-        num_txns = random.randint(1, 6)
-        for _ in range(num_txns):
-            txn_type = random.choice(txn_types)
-
-            # Heuristic: if the enum name hints at redemption, make it negative.
-            lower = txn_type.lower()
-            if "redeem" in lower or "spend" in lower or "debit" in lower:
-                miles_delta = -random.randint(500, 50_000)
-            else:
-                miles_delta = random.randint(500, 50_000)
-
-            flight_id = random.choice(flight_ids)
-            posted_at = random_datetime(2023, 2026)
-
-            rows.append(
-                {
-                    "loyalty_id": lid,
-                    "flight_id": flight_id,
-                    "txn_type": txn_type,
-                    "miles_delta": miles_delta,
-                    "posted_at": posted_at,
-                }
-            )
+    rng = np.random.default_rng(42)
 
-    return rows
+    lid_arr = np.asarray(loyalty_ids, dtype=np.int64)
+    fid_arr = np.asarray(flight_ids, dtype=np.int64)
+    types = np.array(txn_types)
+
+    # Precompute the sign for each enum label (redemption-ish => negative)
+    signs = np.array(
+        [
+            -1 if any(k in t.lower() for k in ("redeem", "spend", "debit")) else 1
+            for t in txn_types
+        ]
+    )
+
+    counts = rng.integers(1, 7, lid_arr.size)
+    total = int(counts.sum())
+
+    lids = np.repeat(lid_arr, counts)
+    type_idx = rng.integers(0, types.size, total)
+    deltas = signs[type_idx] * rng.integers(500, 50_001, total)
+    fids = fid_arr[rng.integers(0, fid_arr.size, total)]
+
+    start = np.datetime64("2023-01-01T00:00:00")
+    end = np.datetime64("2026-12-31T23:59:59")
+    span_s = int((end - start) / np.timedelta64(1, "s"))
+    posted = start + rng.integers(0, span_s + 1, total).astype("timedelta64[s]")
+
+    return [
+        {
+            "loyalty_id": lid,
+            "flight_id": fid,
+            "txn_type": txn_type,
+            "miles_delta": delta,
+            "posted_at": posted_at,
+        }
+        for lid, fid, txn_type, delta, posted_at in zip(
+            lids.tolist(),
+            fids.tolist(),
+            types[type_idx].tolist(),
+            deltas.tolist(),
+            posted.tolist(),
+        )
+    ]
 
 
 # ---------------------------------------------------------------------------
 # Inserts
 # ---------------------------------------------------------------------------
 
+# Statement strings built once at import time; execute_values only has to
+# splice the VALUES pages in, with no per-call statement assembly.
+PASSENGERS_INSERT_SQL = """
+    INSERT INTO airline.passengers (
+        first_name, last_name, email, gender,
+        age_group, state_or_country, created_at
+    )
+    VALUES %s
+    RETURNING passenger_id;
+"""
+
+LOYALTY_INSERT_SQL = """
+    INSERT INTO airline.loyalty_accounts (
+        passenger_id, tier, miles_balance, enrolled_at
+    )
+    VALUES %s
+    RETURNING loyalty_id;
+"""
+
+
 def insert_passengers(conn, rows):
+    """
+    Insert passengers and return their new passenger_ids.
+
+    Uses psycopg2's execute_values with RETURNING — executemany can't
+    return rows, so this is the one-round-trip way to get the generated
+    keys back without re-SELECTing the whole table afterwards.
+    """
     if not rows:
         print("⚠️ No passenger rows generated.")
-        return
+        return []
 
-    conn.execute(
-        text(
-            """
-            INSERT INTO airline.passengers (
-                first_name,
-                last_name,
-                email,
-                gender,
-                age_group,
-                state_or_country,
-                created_at
+    cur = conn.connection.cursor()
+    returned = execute_values(
+        cur,
+        PASSENGERS_INSERT_SQL,
+        [
+            (
+                r["first_name"], r["last_name"], r["email"], r["gender"],
+                r["age_group"], r["state_or_country"], r["created_at"],
             )
-            VALUES (
-                :first_name,
-                :last_name,
-                :email,
-                :gender,
-                :age_group,
-                :state_or_country,
-                :created_at
-            );
-            """
-        ),
-        rows,
+            for r in rows
+        ],
+        page_size=1000,
+        fetch=True,
     )
     print(f"✅ Inserted {len(rows)} passengers.")
+    return [r[0] for r in returned]
 
 
 def insert_loyalty_accounts(conn, rows):
+    """Insert loyalty accounts and return their new loyalty_ids."""
     if not rows:
         print("⚠️ No loyalty accounts generated.")
-        return
+        return []
 
-    conn.execute(
-        text(
-            """
-            INSERT INTO airline.loyalty_accounts (
-                passenger_id,
-                tier,
-                miles_balance,
-                enrolled_at
-            )
-            VALUES (
-                :passenger_id,
-                :tier,
-                :miles_balance,
-                :enrolled_at
-            );
-            """
-        ),
-        rows,
+    cur = conn.connection.cursor()
+    returned = execute_values(
+        cur,
+        LOYALTY_INSERT_SQL,
+        [
+            (r["passenger_id"], r["tier"], r["miles_balance"], r["enrolled_at"])
+            for r in rows
+        ],
+        page_size=1000,
+        fetch=True,
     )
     print(f"✅ Inserted {len(rows)} loyalty accounts.")
+    return [r[0] for r in returned]
 
 
 def insert_miles_transactions(conn, rows):
+    """
+    Bulk-load miles transactions with COPY via a temp stage.
+
+    This is the largest insert in the script (up to 6 rows per loyalty
+    account), so it streams as one COPY instead of paged INSERTs; the
+    stage carries txn_type as text and casts to the enum on the way in.
+    """
     if not rows:
         print("⚠️ No miles transactions generated.")
         return
 
+    conn.execute(
+        text(
+            """
+            CREATE TEMP TABLE miles_txn_stage(
+                loyalty_id BIGINT,
+                flight_id BIGINT,
+                txn_type TEXT,
+                miles_delta INT,
+                posted_at TIMESTAMP
+            ) ON COMMIT DROP;
+            """
+        )
+    )
+
+    cols = ["loyalty_id", "flight_id", "txn_type", "miles_delta", "posted_at"]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for r in rows:
+        writer.writerow([r"\N" if r[c] is None else r[c] for c in cols])
+    buf.seek(0)
+    conn.connection.cursor().copy_expert(
+        f"COPY miles_txn_stage ({', '.join(cols)}) "
+        r"FROM STDIN WITH (FORMAT csv, NULL '\N')",
+        buf,
+    )
+
     conn.execute(
         text(
             """
             INSERT INTO airline.miles_transactions (
-                loyalty_id,
-                flight_id,
-                txn_type,
-                miles_delta,
-                posted_at
+                loyalty_id, flight_id, txn_type, miles_delta, posted_at
             )
-            VALUES (
-                :loyalty_id,
-                :flight_id,
-                :txn_type,
-                :miles_delta,
-                :posted_at
-            );
+            SELECT loyalty_id, flight_id, txn_type::airline.miles_txn_type,
+                   miles_delta, posted_at
+            FROM miles_txn_stage;
             """
-        ),
-        rows,
+        )
     )
     print(f"✅ Inserted {len(rows)} miles transactions.")
 
@@ -307,49 +445,51 @@ def main():
     NUM_PASSENGERS = 5000
 
     print("🔗 Connecting to database...")
-    with ENGINE.begin() as conn:
-        # 1) Reference data
-        print("📥 Fetching enum values and flights...")
-
-        try:
-            loyalty_tiers = fetch_enum_values(conn, "airline.loyalty_tier")
-        except Exception as exc:  # noqa: BLE001
-            print(f"⚠️ Could not fetch airline.loyalty_tier enum values: {exc}")
-            loyalty_tiers = []
-
-        try:
-            miles_txn_types = fetch_enum_values(conn, "airline.miles_txn_type")
-        except Exception as exc:  # noqa: BLE001
-            print(f"⚠️ Could not fetch airline.miles_txn_type enum values: {exc}")
-            miles_txn_types = []
-
-        flight_ids = fetch_flight_ids(conn)
-        print(f"✈️  Found {len(flight_ids)} flights in airline.flights.")
-        if not flight_ids:
-            raise RuntimeError("No flights found in airline.flights; run synth_flights.py first.")
-
-        # 2) Passengers
-        print("👥 Generating synthetic passengers...")
-        passenger_rows = generate_passenger_rows(NUM_PASSENGERS)
-        insert_passengers(conn, passenger_rows)
-
-        # Refresh passenger IDs from DB (includes existing + new)
-        passenger_ids = fetch_passenger_ids(conn)
-        print(f"👥 Total passengers now: {len(passenger_ids)}")
-
-        # 3) Loyalty accounts
-        print("💳 Generating loyalty accounts...")
-        loyalty_rows = generate_loyalty_rows(passenger_ids, loyalty_tiers, loyalty_ratio=0.6)
-        insert_loyalty_accounts(conn, loyalty_rows)
-
-        # Refresh loyalty IDs
-        loyalty_ids = fetch_loyalty_ids(conn)
-        print(f"💳 Total loyalty accounts now: {len(loyalty_ids)}")
-
-        # 4) Miles transactions
-        print("🧾 Generating miles transactions...")
-        miles_rows = generate_miles_txn_rows(loyalty_ids, flight_ids, miles_txn_types)
-        insert_miles_transactions(conn, miles_rows)
+    # Passenger generation is pure Faker/NumPy CPU work with no DB
+    # dependency, so kick it off on a worker thread and let it overlap
+    # the reference fetches (the worker never touches the connection).
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        passenger_future = pool.submit(generate_passenger_rows, NUM_PASSENGERS)
+
+        with ENGINE.begin() as conn:
+            # Synthetic data doesn't need per-commit fsync durability; LOCAL
+            # scopes both knobs to this transaction.
+            conn.execute(text("SET LOCAL synchronous_commit = 'off';"))
+            conn.execute(text("SET LOCAL work_mem = '256MB';"))
+
+            # 1) Reference data
+            print("📥 Fetching enum values and flights...")
+
+            try:
+                loyalty_tiers, miles_txn_types = fetch_reference_enums(conn)
+            except Exception as exc:  # noqa: BLE001
+                print(f"⚠️ Could not fetch loyalty_tier / miles_txn_type enum values: {exc}")
+                loyalty_tiers, miles_txn_types = [], []
+
+            flight_ids = load_flight_ids(conn)
+            print(f"✈️  Found {len(flight_ids)} flights.")
+            if len(flight_ids) == 0:
+                raise RuntimeError("No flights found in airline.flights; run synth_flights.py first.")
+
+            # 2) Passengers
+            print("👥 Generating synthetic passengers...")
+            passenger_rows = passenger_future.result()
+
+            # RETURNING hands back the generated keys directly — no full-table
+            # re-SELECT between the insert and the dependent generators.
+            passenger_ids = insert_passengers(conn, passenger_rows)
+            print(f"👥 New passengers this run: {len(passenger_ids)}")
+
+            # 3) Loyalty accounts
+            print("💳 Generating loyalty accounts...")
+            loyalty_rows = generate_loyalty_rows(passenger_ids, loyalty_tiers, loyalty_ratio=0.6)
+            loyalty_ids = insert_loyalty_accounts(conn, loyalty_rows)
+            print(f"💳 New loyalty accounts this run: {len(loyalty_ids)}")
+
+            # 4) Miles transactions
+            print("🧾 Generating miles transactions...")
+            miles_rows = generate_miles_txn_rows(loyalty_ids, flight_ids, miles_txn_types)
+            insert_miles_transactions(conn, miles_rows)
 
     print("🎉 Synthetic customers & loyalty data load complete.")
 
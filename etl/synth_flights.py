@@ -1,8 +1,10 @@
 
+import csv
+import io
 import os
-import random
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 
+import numpy as np
 from sqlalchemy import create_engine, text
 
 
@@ -18,7 +20,16 @@ def get_db_url() -> str:
     return url
 
 
-ENGINE = create_engine(get_db_url(), future=True, pool_pre_ping=True)
+# Rewrite parameterized executemany into multi-VALUES pages of 1000 via
+# psycopg2's fast-execution helpers; no call-site changes needed.
+ENGINE = create_engine(
+    get_db_url(),
+    future=True,
+    pool_pre_ping=True,
+    executemany_mode="values_plus_batch",
+    executemany_values_page_size=1000,
+    executemany_batch_page_size=1000,
+)
 
 
 # ---------- FETCH LOOKUP DATA ----------
@@ -98,122 +109,206 @@ def fetch_flight_status_values(conn):
 # ---------- GENERATE SYNTHETIC FLIGHTS ----------
 
 def generate_flights(airlines, airports, statuses, n=5000, seed=42):
-    random.seed(seed)
+    """
+    Generate n synthetic flights with vectorized NumPy draws.
+
+    All randomness, date math, and delay logic run as whole-array ops.
+    Returns struct-of-arrays: one column list per field (native Python
+    values via .tolist()), keyed by FLIGHT_COLUMNS names — no per-row
+    dicts are ever materialized; insert_flights zips the columns
+    directly into the COPY stream.
+    """
+    rng = np.random.default_rng(seed)
 
-    flights = []
+    airline_ids = np.array([al["airline_id"] for al in airlines], dtype=np.int64)
+    airline_iatas = np.array([al["iata_code"] for al in airlines], dtype="U3")
+    airport_ids = np.array([ap["airport_id"] for ap in airports], dtype=np.int64)
 
     now = datetime.utcnow()
     start_date = date(now.year - 1, 1, 1)
     end_date = date(now.year + 1, 12, 31)
     total_days = (end_date - start_date).days
 
-    for _ in range(n):
-        al = random.choice(airlines)
-        origin, dest = random.sample(airports, 2)
-
-        # Date + basic schedule
-        day_offset = random.randrange(total_days)
-        flight_date = start_date + timedelta(days=day_offset)
+    al_idx = rng.integers(0, airline_ids.size, n)
+
+    # Origin/destination pairs: draw dest from one fewer slot and bump
+    # past the origin — exactly sampling-without-replacement of 2, with
+    # no collision branch at all
+    origin_idx = rng.integers(0, airport_ids.size, n)
+    dest_idx = rng.integers(0, airport_ids.size - 1, n)
+    dest_idx = np.where(dest_idx >= origin_idx, dest_idx + 1, dest_idx)
+
+    # Date + basic schedule
+    day_offset = rng.integers(0, total_days, n)
+    dep_dt = (
+        np.datetime64(start_date).astype("datetime64[m]")
+        + day_offset * np.timedelta64(1440, "m")
+        + rng.integers(5, 23, n) * np.timedelta64(60, "m")
+        + rng.choice(np.array([0, 15, 30, 45]), n) * np.timedelta64(1, "m")
+    )
+    block_minutes = rng.integers(60, 6 * 60 + 1, n)  # 1–6 hours
+    arr_dt = dep_dt + block_minutes * np.timedelta64(1, "m")
+
+    status_arr = np.array(statuses)[rng.integers(0, len(statuses), n)]
+    lower = np.char.lower(status_arr)
+    is_cancel = np.char.startswith(lower, "cancel")
+    is_sched = np.char.startswith(lower, "sched")
+    has_actuals = ~(is_cancel | is_sched)
+
+    # Delay / actual times logic
+    delay = np.where(
+        is_cancel,
+        rng.integers(60, 301, n),
+        np.where(is_sched, 0, rng.integers(0, 181, n)),
+    )
+    cause_pool = np.array(
+        ["Weather", "Crew", "Maintenance", "ATC", "Late inbound", None], dtype=object
+    )
+    delay_cause = np.where(
+        is_cancel,
+        "Cancellation",
+        np.where(is_sched, None, cause_pool[rng.integers(0, cause_pool.size, n)]),
+    )
+    nat = np.datetime64("NaT")
+    actual_dep = np.where(has_actuals, dep_dt + delay * np.timedelta64(1, "m"), nat)
+    actual_arr = np.where(has_actuals, arr_dt + delay * np.timedelta64(1, "m"), nat)
 
-        dep_hour = random.randint(5, 22)
-        dep_min = random.choice([0, 15, 30, 45])
-        dep_dt = datetime.combine(flight_date, datetime.min.time()) + timedelta(
-            hours=dep_hour, minutes=dep_min
-        )
+    flight_numbers = np.char.add(
+        airline_iatas[al_idx],
+        np.char.zfill(rng.integers(1, 10000, n).astype("U4"), 4),
+    )
 
-        block_minutes = random.randint(60, 6 * 60)  # 1–6 hours
-        arr_dt = dep_dt + timedelta(minutes=block_minutes)
-
-        status = random.choice(statuses)
-        status_lower = status.lower()
-
-        # Delay / actual times logic
-        if status_lower.startswith("cancel"):
-            delay = random.randint(60, 300)
-            delay_cause = "Cancellation"
-            actual_dep = None
-            actual_arr = None
-        elif status_lower.startswith("sched"):
-            delay = 0
-            delay_cause = None
-            actual_dep = None
-            actual_arr = None
-        else:
-            delay = random.randint(0, 180)
-            delay_cause = random.choice(
-                ["Weather", "Crew", "Maintenance", "ATC", "Late inbound", None]
-            )
-            actual_dep = dep_dt + timedelta(minutes=delay)
-            actual_arr = arr_dt + timedelta(minutes=delay)
-
-        flight_number = f"{al['iata_code']}{random.randint(1, 9999):04d}"
-
-        flights.append(
-            {
-                "airline_id": al["airline_id"],
-                "origin_airport_id": origin["airport_id"],
-                "destination_airport_id": dest["airport_id"],
-                "flight_number": flight_number,
-                "flight_date": flight_date,
-                "scheduled_departure_utc": dep_dt,
-                "scheduled_arrival_utc": arr_dt,
-                "actual_departure_utc": actual_dep,
-                "actual_arrival_utc": actual_arr,
-                "delay_minutes": delay,
-                "delay_cause": delay_cause,
-                "status": status,
-            }
-        )
+    # Render all timestamps in one vectorized np.datetime_as_string pass
+    # rather than per-row datetime.__str__ calls inside the CSV writer;
+    # NaT slots become empty fields, which COPY reads as NULL.
+    actual_dep_s = np.where(
+        has_actuals, np.datetime_as_string(actual_dep, unit="s"), ""
+    )
+    actual_arr_s = np.where(
+        has_actuals, np.datetime_as_string(actual_arr, unit="s"), ""
+    )
 
-    return flights
+    # .tolist() converts the rest to native Python ints / strings / None
+    return {
+        "airline_id": airline_ids[al_idx].tolist(),
+        "origin_airport_id": airport_ids[origin_idx].tolist(),
+        "destination_airport_id": airport_ids[dest_idx].tolist(),
+        "flight_number": flight_numbers.tolist(),
+        "flight_date": np.datetime_as_string(dep_dt, unit="D").tolist(),
+        "scheduled_departure_utc": np.datetime_as_string(dep_dt, unit="s").tolist(),
+        "scheduled_arrival_utc": np.datetime_as_string(arr_dt, unit="s").tolist(),
+        "actual_departure_utc": actual_dep_s.tolist(),
+        "actual_arrival_utc": actual_arr_s.tolist(),
+        "delay_minutes": delay.tolist(),
+        "delay_cause": delay_cause.tolist(),
+        "status": status_arr.tolist(),
+    }
+
+
+# In-process id handoff to synth_customers.py, which runs right after
+# this script and would otherwise re-SELECT the whole flights table.
+FLIGHT_IDS_CACHE = "data/.flight_ids.npy"
+
+FLIGHT_COLUMNS = [
+    "airline_id",
+    "origin_airport_id",
+    "destination_airport_id",
+    "flight_number",
+    "flight_date",
+    "scheduled_departure_utc",
+    "scheduled_arrival_utc",
+    "actual_departure_utc",
+    "actual_arrival_utc",
+    "delay_minutes",
+    "delay_cause",
+    "status",
+]
 
 
 def insert_flights(conn, flights):
-    if not flights:
+    """
+    Bulk-load flights via COPY into a temp stage, then upsert.
+
+    COPY streams the whole batch in one round-trip instead of paging
+    parameterized INSERTs; the stage + ON CONFLICT step keeps reruns
+    idempotent on the (airline, flight_number, flight_date) key.
+
+    `flights` is the struct-of-arrays dict from generate_flights; rows
+    are zipped out of the column lists straight into the CSV buffer.
+    """
+    if not flights or not flights["airline_id"]:
         print("⚠️ No flights to insert.")
         return
 
     conn.execute(
+        text(
+            """
+            CREATE TEMP TABLE flights_stage(
+                airline_id BIGINT,
+                origin_airport_id BIGINT,
+                destination_airport_id BIGINT,
+                flight_number TEXT,
+                flight_date DATE,
+                scheduled_departure_utc TIMESTAMP,
+                scheduled_arrival_utc TIMESTAMP,
+                actual_departure_utc TIMESTAMP,
+                actual_arrival_utc TIMESTAMP,
+                delay_minutes INT,
+                delay_cause TEXT,
+                status TEXT
+            ) ON COMMIT DROP;
+            """
+        )
+    )
+
+    # None comes out as an unquoted empty field, which is CSV COPY's
+    # default NULL spelling
+    buf = io.StringIO()
+    csv.writer(buf).writerows(zip(*(flights[c] for c in FLIGHT_COLUMNS)))
+    buf.seek(0)
+    conn.connection.cursor().copy_expert(
+        f"COPY flights_stage ({', '.join(FLIGHT_COLUMNS)}) "
+        "FROM STDIN WITH (FORMAT csv)",
+        buf,
+    )
+
+    inserted = conn.execute(
         text(
             """
             INSERT INTO airline.flights (
-                airline_id,
-                origin_airport_id,
-                destination_airport_id,
-                flight_number,
-                flight_date,
-                scheduled_departure_utc,
-                scheduled_arrival_utc,
-                actual_departure_utc,
-                actual_arrival_utc,
-                delay_minutes,
-                delay_cause,
-                status
+                airline_id, origin_airport_id, destination_airport_id,
+                flight_number, flight_date,
+                scheduled_departure_utc, scheduled_arrival_utc,
+                actual_departure_utc, actual_arrival_utc,
+                delay_minutes, delay_cause, status
             )
-            VALUES (
-                :airline_id,
-                :origin_airport_id,
-                :destination_airport_id,
-                :flight_number,
-                :flight_date,
-                :scheduled_departure_utc,
-                :scheduled_arrival_utc,
-                :actual_departure_utc,
-                :actual_arrival_utc,
-                :delay_minutes,
-                :delay_cause,
-                :status
-            );
+            SELECT
+                airline_id, origin_airport_id, destination_airport_id,
+                flight_number, flight_date,
+                scheduled_departure_utc, scheduled_arrival_utc,
+                actual_departure_utc, actual_arrival_utc,
+                delay_minutes, delay_cause, status::airline.flight_status
+            FROM flights_stage
+            ON CONFLICT ON CONSTRAINT uq_flight_instance DO NOTHING
+            RETURNING flight_id;
             """
-        ),
-        flights,
-    )
+        )
+    ).all()
+
+    new_ids = np.array([r[0] for r in inserted], dtype=np.int64)
+    np.save(FLIGHT_IDS_CACHE, new_ids)
+    print(f"💾 Cached {new_ids.size} flight ids to {FLIGHT_IDS_CACHE}")
 
 
 # ---------- MAIN ----------
 
 def main():
     with ENGINE.begin() as conn:
+        # Synthetic data doesn't need per-commit fsync durability; LOCAL
+        # scopes both knobs to this transaction.
+        conn.execute(text("SET LOCAL synchronous_commit = 'off';"))
+        conn.execute(text("SET LOCAL work_mem = '256MB';"))
+
         cols = conn.execute(
             text(
                 """
@@ -234,7 +329,7 @@ def main():
         print("📊 flight_status enum values:", statuses)
 
         flights = generate_flights(airlines, airports, statuses, n=5000)
-        print(f"✈️ Generated {len(flights)} synthetic flights.")
+        print(f"✈️ Generated {len(flights['airline_id'])} synthetic flights.")
 
         insert_flights(conn, flights)
         print("✅ Synthetic flights inserted.")
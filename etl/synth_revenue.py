@@ -26,14 +26,16 @@ Schema assumptions:
     - paid_at           TIMESTAMP WITHOUT TIME ZONE NOT NULL
 """
 
+import csv
+import io
 import os
-import random
-from decimal import Decimal
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
-from faker import Faker
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -47,8 +49,6 @@ BOOKING_CHANNELS = ["Web", "Mobile", "Call Center", "Travel Agent"]
 PAYMENT_METHODS = ["Card", "Points", "Cash", "Voucher"]
 PAYMENT_STATUSES = ["Authorized", "Captured", "Refunded", "Failed"]
 
-fake = Faker()
-
 
 def get_db_url() -> str:
     """
@@ -66,225 +66,292 @@ def get_db_url() -> str:
     return url
 
 
-ENGINE = create_engine(get_db_url(), future=True, pool_pre_ping=True)
+# Rewrite parameterized executemany into multi-VALUES pages of 1000 via
+# psycopg2's fast-execution helpers (SQLAlchemy >= 1.4); any remaining
+# list-of-dicts execute() in this module batches automatically.
+ENGINE = create_engine(
+    get_db_url(),
+    future=True,
+    pool_pre_ping=True,
+    executemany_mode="values_plus_batch",
+    executemany_values_page_size=1000,
+    executemany_batch_page_size=1000,
+)
 
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-def money(x: float) -> Decimal:
-    """Round to 2 decimal places and return Decimal."""
-    return Decimal(f"{x:.2f}")
-
-
 def fetch_passengers_and_flights(con):
-    """Return lists of passenger_ids and flight_ids."""
-    passenger_ids = [
-        row[0]
-        for row in con.execute(
-            text("SELECT passenger_id FROM airline.passengers ORDER BY passenger_id")
-        )
-    ]
-    flight_ids = [
-        row[0]
-        for row in con.execute(
-            text("SELECT flight_id FROM airline.flights ORDER BY flight_id")
-        )
-    ]
+    """
+    Return passenger_ids and flight_ids as int64 NumPy arrays.
 
-    if not passenger_ids:
+    pd.read_sql pulls each result as one column instead of iterating
+    Python row objects, and the generator indexes the ndarrays directly.
+    """
+    passenger_ids = pd.read_sql(
+        text("SELECT passenger_id FROM airline.passengers"), con
+    )["passenger_id"].to_numpy(np.int64)
+    flight_ids = pd.read_sql(
+        text("SELECT flight_id FROM airline.flights"), con
+    )["flight_id"].to_numpy(np.int64)
+
+    if passenger_ids.size == 0:
         raise RuntimeError("No rows found in airline.passengers.")
-    if not flight_ids:
+    if flight_ids.size == 0:
         raise RuntimeError("No rows found in airline.flights.")
 
-    print(f"👥 Found {len(passenger_ids)} passengers.")
-    print(f"✈️  Found {len(flight_ids)} flights.")
+    print(f"👥 Found {passenger_ids.size} passengers.")
+    print(f"✈️  Found {flight_ids.size} flights.")
     return passenger_ids, flight_ids
 
 
-def fetch_existing_booking_pairs(con):
-    """
-    Load existing (passenger_id, flight_id) pairs from airline.bookings
-    so we don't violate UNIQUE (passenger_id, flight_id).
-    """
-    rows = con.execute(
-        text("SELECT passenger_id, flight_id FROM airline.bookings")
-    ).fetchall()
-    existing = {(int(r[0]), int(r[1])) for r in rows}
-    print(f"🔗 Existing booking pairs (passenger, flight): {len(existing)}")
-    return existing
-
-
-def generate_booking_payloads(passenger_ids, flight_ids, n_bookings: int, used_pairs: set):
+def generate_booking_payloads(passenger_ids, flight_ids, n_bookings: int):
     """
     Generate payload dictionaries for airline.bookings WITHOUT booking_id.
 
+    Only dedups within the batch itself; collisions with pairs already
+    in the table are left for the UNIQUE index to drop via
+    ON CONFLICT DO NOTHING, which spares pulling the whole bookings
+    table client-side on every run.
+
     Args:
         passenger_ids: list[int]
         flight_ids: list[int]
         n_bookings: desired number of new bookings
-        used_pairs: set of (passenger_id, flight_id) already present
 
     Returns:
         bookings_payload: list[dict] ready for INSERT (no booking_id)
     """
-    bookings = []
-
     print(f"🧾 Generating up to {n_bookings} synthetic bookings (unique per passenger/flight)...")
-    attempts = 0
-    max_attempts = n_bookings * 10  # generous upper bound
-
-    while len(bookings) < n_bookings and attempts < max_attempts:
-        attempts += 1
-
-        passenger_id = random.choice(passenger_ids)
-        flight_id = random.choice(flight_ids)
-        key = (passenger_id, flight_id)
-
-        # Avoid violating UNIQUE (passenger_id, flight_id)
-        if key in used_pairs:
-            continue
-        used_pairs.add(key)
-
-        booking_date = fake.date_time_between(start_date="-9M", end_date="+3M")
-
-        fare_class = random.choices(
-            FARE_CLASSES, weights=[0.35, 0.30, 0.20, 0.10, 0.05]
-        )[0]
-        channel = random.choices(
-            BOOKING_CHANNELS, weights=[0.55, 0.25, 0.10, 0.10]
-        )[0]
-
-        # Base price ~ 80–900 with some long tail
-        base_price = money(random.lognormvariate(4.5, 0.5))
-        base_price = max(money(80), min(base_price, money(900)))
-
-        bookings.append(
-            {
-                "passenger_id": passenger_id,
-                "flight_id": flight_id,
-                "booking_date": booking_date,
-                "fare_class": fare_class,
-                "base_price_usd": base_price,
-                "booking_channel": channel,
-            }
+
+    rng = np.random.default_rng()
+
+    p_arr = np.asarray(passenger_ids, dtype=np.int64)
+    f_arr = np.asarray(flight_ids, dtype=np.int64)
+
+    # Oversample 2x so dedup + the used-pair filter still leave enough;
+    # every column below is one whole-array draw instead of a per-row
+    # random.choice / choices call.
+    m = n_bookings * 2
+    p_ids = p_arr[rng.integers(0, p_arr.size, m)]
+    f_ids = f_arr[rng.integers(0, f_arr.size, m)]
+
+    # Pack each pair into one int64 and dedup the batch as an array op
+    codes = (p_ids << 32) | f_ids
+    _, first_idx = np.unique(codes, return_index=True)
+    survivors = np.sort(first_idx)[:n_bookings]
+    fresh = list(zip(p_ids[survivors].tolist(), f_ids[survivors].tolist()))
+
+    k = len(fresh)
+    fares = rng.choice(FARE_CLASSES, size=k, p=[0.35, 0.30, 0.20, 0.10, 0.05]).tolist()
+    channels = rng.choice(BOOKING_CHANNELS, size=k, p=[0.55, 0.25, 0.10, 0.10]).tolist()
+
+    # Base price ~ 80–900 with some long tail
+    prices = np.clip(rng.lognormal(4.5, 0.5, k), 80.0, 900.0).round(2)
+
+    # Booking dates: ~9 months back to ~3 months ahead, drawn as one
+    # minute-offset array instead of a Faker call per booking
+    start = np.datetime64(datetime.utcnow(), "m") - np.timedelta64(9 * 30 * 1440, "m")
+    span_min = 12 * 30 * 1440
+    booking_dates = (start + rng.integers(0, span_min, k).astype("timedelta64[m]")).tolist()
+
+    bookings = [
+        {
+            "passenger_id": p,
+            "flight_id": f,
+            "booking_date": booking_date,
+            "fare_class": fare,
+            "base_price_usd": price,
+            "booking_channel": channel,
+        }
+        for (p, f), booking_date, fare, price, channel in zip(
+            fresh, booking_dates, fares, prices.tolist(), channels
         )
+    ]
 
     if len(bookings) < n_bookings:
         print(
             f"⚠️ Only generated {len(bookings)} unique booking pairs "
-            f"out of requested {n_bookings} (attempts={attempts})."
+            f"out of requested {n_bookings}."
         )
 
     print(f"✅ Prepared {len(bookings)} booking payloads.")
     return bookings
 
 
-def insert_bookings_and_return(con, booking_payloads):
+def allocate_booking_ids(con, n: int):
+    """Pre-allocate n booking_ids from the sequence in one call."""
+    return [
+        r[0]
+        for r in con.execute(
+            text(
+                """
+                SELECT nextval(pg_get_serial_sequence('airline.bookings', 'booking_id'))
+                FROM generate_series(1, :n);
+                """
+            ),
+            {"n": n},
+        )
+    ]
+
+
+def copy_bookings(con, booking_ids, booking_payloads, bulk=False):
     """
-    Insert into airline.bookings (letting Postgres assign booking_id)
-    and then SELECT the newly inserted rows using booking_id > max_before.
+    Stream bookings into Postgres with COPY and upsert from a stage.
+
+    COPY has no ON CONFLICT, so rows land in an ON COMMIT DROP stage
+    (ids pre-assigned) and one INSERT ... SELECT applies
+    ON CONFLICT (passenger_id, flight_id) DO NOTHING — pairs already
+    booked are dropped by the unique index in ~log N per row instead of
+    being pre-filtered client-side. The ids are still known before the
+    stream starts, so the caller can build payments concurrently;
+    payments whose booking lost the conflict are filtered out by
+    insert_payments' EXISTS probe.
+
+    bulk=True (BULK=1, empty/trusted table only) drops both unique
+    btrees on (passenger_id, flight_id) — the uq_booking_unique
+    constraint and the redundant partial uq_bookings_passenger_flight
+    index from 04_constraints_indexes.sql — and skips FK checks for the
+    duration of the transaction, then rebuilds both once at the end:
+    two index builds instead of per-row btree maintenance. If the batch
+    does contain a duplicate pair the constraint rebuild fails and the
+    transaction rolls back, so nothing partial can land.
     """
-    if not booking_payloads:
-        print("ℹ️ No bookings to insert.")
-        return []
-
-    # baseline max booking_id
-    max_before = con.execute(
-        text("SELECT COALESCE(MAX(booking_id), 0) FROM airline.bookings")
-    ).scalar_one()
+    if bulk:
+        # LOCAL: reverts at commit/rollback. Replica role disables FK
+        # trigger firing; with both unique btrees dropped the big
+        # INSERT is append-only.
+        con.execute(
+            text("ALTER TABLE airline.bookings DROP CONSTRAINT uq_booking_unique;")
+        )
+        con.execute(text("DROP INDEX IF EXISTS airline.uq_bookings_passenger_flight;"))
+        con.execute(text("SET LOCAL session_replication_role = 'replica';"))
 
-    # bulk insert WITHOUT RETURNING to avoid SQLAlchemy/psycopg2 weirdness
     con.execute(
         text(
             """
-            INSERT INTO airline.bookings (
-                passenger_id,
-                flight_id,
-                booking_date,
-                fare_class,
-                base_price_usd,
-                booking_channel
-            )
-            VALUES (
-                :passenger_id,
-                :flight_id,
-                :booking_date,
-                :fare_class,
-                :base_price_usd,
-                :booking_channel
-            );
+            CREATE TEMP TABLE bookings_stage(
+                booking_id BIGINT,
+                passenger_id BIGINT,
+                flight_id BIGINT,
+                booking_date TIMESTAMP,
+                fare_class TEXT,
+                base_price_usd NUMERIC(10,2),
+                booking_channel TEXT
+            ) ON COMMIT DROP;
             """
-        ),
-        booking_payloads,
+        )
     )
 
-    # now pull back just the new rows
+    cols = [
+        "booking_id", "passenger_id", "flight_id", "booking_date",
+        "fare_class", "base_price_usd", "booking_channel",
+    ]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for bid, b in zip(booking_ids, booking_payloads):
+        writer.writerow(
+            [
+                bid, b["passenger_id"], b["flight_id"], b["booking_date"],
+                b["fare_class"], b["base_price_usd"], b["booking_channel"],
+            ]
+        )
+    buf.seek(0)
+    con.connection.cursor().copy_expert(
+        f"COPY bookings_stage ({', '.join(cols)}) FROM STDIN WITH (FORMAT csv)",
+        buf,
+    )
+
+    # Without the unique index there is nothing for ON CONFLICT to
+    # arbitrate on, so the bulk path is a plain append.
+    conflict_clause = "" if bulk else "ON CONFLICT (passenger_id, flight_id) DO NOTHING"
     result = con.execute(
         text(
+            f"""
+            INSERT INTO airline.bookings (
+                booking_id, passenger_id, flight_id, booking_date,
+                fare_class, base_price_usd, booking_channel
+            )
+            SELECT booking_id, passenger_id, flight_id, booking_date,
+                   fare_class::airline.fare_class, base_price_usd,
+                   booking_channel::airline.booking_channel
+            FROM bookings_stage
+            {conflict_clause};
             """
-            SELECT booking_id,
-                   passenger_id,
-                   flight_id,
-                   booking_date,
-                   fare_class,
-                   base_price_usd,
-                   booking_channel
-            FROM airline.bookings
-            WHERE booking_id > :max_before
-            ORDER BY booking_id;
-            """
-        ),
-        {"max_before": max_before},
+        )
     )
+    print(f"✅ New bookings inserted: {result.rowcount} (conflicts skipped).")
 
-    rows = result.mappings().all()
-    print(f"✅ New bookings inserted: {len(rows)}")
-    return rows
+    if bulk:
+        con.execute(
+            text(
+                """
+                ALTER TABLE airline.bookings
+                    ADD CONSTRAINT uq_booking_unique UNIQUE (passenger_id, flight_id);
+                """
+            )
+        )
+        con.execute(
+            text(
+                """
+                CREATE UNIQUE INDEX uq_bookings_passenger_flight
+                    ON airline.bookings (passenger_id, flight_id)
+                    WHERE flight_id IS NOT NULL;
+                """
+            )
+        )
+        print("🔧 Rebuilt unique indexes on (passenger_id, flight_id) after bulk load.")
 
 
 def build_payments_from_bookings(inserted_bookings):
     """
-    Given rows returned from insert_bookings_and_return, build matching
+    Given rows returned from the bookings insert, build matching
     payments payloads.
 
     Each payment:
       - amount_usd ~ base_price_usd * [0.9, 1.15]
-      - paid_at is always NON-NULL (some time after booking_date)
+      - paid_at is always NON-NULL (within a day after booking_date)
+
+    All columns are whole-array draws: weighted method/status choices,
+    one rounded multiply for amounts, and a minute-offset add on a
+    datetime64 array for paid_at.
     """
-    payments = []
-
-    for row in inserted_bookings:
-        booking_id = row["booking_id"]
-        booking_date = row["booking_date"]
-        base_price = row["base_price_usd"]
-
-        method = random.choices(
-            PAYMENT_METHODS,
-            weights=[0.7, 0.1, 0.1, 0.1],
-        )[0]
-        status = random.choices(
-            PAYMENT_STATUSES,
-            weights=[0.65, 0.15, 0.10, 0.10],
-        )[0]
-
-        multiplier = random.uniform(0.9, 1.15)
-        amount = money(float(base_price) * multiplier)
-
-        # paid_at: always non-null
-        offset_minutes = random.randint(0, 60 * 24)
-        paid_at = booking_date + timedelta(minutes=offset_minutes)
-
-        payments.append(
-            {
-                "booking_id": booking_id,
-                "amount_usd": amount,
-                "method": method,
-                "status": status,
-                "paid_at": paid_at,
-            }
+    if not inserted_bookings:
+        print("💳 Prepared 0 payments.")
+        return []
+
+    rng = np.random.default_rng()
+    k = len(inserted_bookings)
+
+    booking_ids = np.fromiter(
+        (b["booking_id"] for b in inserted_bookings), dtype=np.int64, count=k
+    )
+    base_prices = np.fromiter(
+        (float(b["base_price_usd"]) for b in inserted_bookings), dtype=np.float64, count=k
+    )
+    booking_dates = np.array(
+        [b["booking_date"] for b in inserted_bookings], dtype="datetime64[m]"
+    )
+
+    methods = rng.choice(PAYMENT_METHODS, size=k, p=[0.7, 0.1, 0.1, 0.1]).tolist()
+    statuses = rng.choice(PAYMENT_STATUSES, size=k, p=[0.65, 0.15, 0.10, 0.10]).tolist()
+    amounts = np.round(base_prices * rng.uniform(0.9, 1.15, k), 2)
+    paid_at = booking_dates + rng.integers(0, 60 * 24 + 1, k).astype("timedelta64[m]")
+
+    payments = [
+        {
+            "booking_id": bid,
+            "amount_usd": amount,
+            "method": method,
+            "status": status,
+            "paid_at": ts,
+        }
+        for bid, amount, method, status, ts in zip(
+            booking_ids.tolist(), amounts.tolist(), methods, statuses, paid_at.tolist()
         )
+    ]
 
     print(f"💳 Prepared {len(payments)} payments.")
     return payments
@@ -295,31 +362,130 @@ def insert_payments(con, payments):
         print("ℹ️ No payments to insert.")
         return 0
 
+    # COPY the payments into a stage, then keep only rows whose booking
+    # actually survived the ON CONFLICT upsert (EXISTS semi-join).
+    # payment_id stays unlisted so the serial default fills it, and the
+    # enum columns are cast from their text spelling on the way in.
     con.execute(
+        text(
+            """
+            CREATE TEMP TABLE payments_stage(
+                booking_id BIGINT,
+                amount_usd NUMERIC(10,2),
+                method TEXT,
+                status TEXT,
+                paid_at TIMESTAMP
+            ) ON COMMIT DROP;
+            """
+        )
+    )
+
+    cols = ["booking_id", "amount_usd", "method", "status", "paid_at"]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for p in payments:
+        writer.writerow(
+            [p["booking_id"], p["amount_usd"], p["method"], p["status"], p["paid_at"]]
+        )
+    buf.seek(0)
+    con.connection.cursor().copy_expert(
+        f"COPY payments_stage ({', '.join(cols)}) FROM STDIN WITH (FORMAT csv)",
+        buf,
+    )
+
+    result = con.execute(
         text(
             """
             INSERT INTO airline.payments (
-                booking_id,
-                amount_usd,
-                method,
-                status,
-                paid_at
+                booking_id, amount_usd, method, status, paid_at
             )
-            VALUES (
-                :booking_id,
-                :amount_usd,
-                :method,
-                :status,
-                :paid_at
+            SELECT ps.booking_id, ps.amount_usd,
+                   ps.method::airline.payment_method,
+                   ps.status::airline.payment_status,
+                   ps.paid_at
+            FROM payments_stage ps
+            WHERE EXISTS (
+                SELECT 1
+                FROM airline.bookings b
+                WHERE b.booking_id = ps.booking_id
             );
             """
-        ),
-        payments,
+        )
     )
-    print(f"💳 Payments inserted: {len(payments)}")
+    print(f"💳 Payments inserted: {result.rowcount}")
     return len(payments)
 
 
+def generate_revenue_in_sql(con, n_bookings: int) -> None:
+    """
+    Generate bookings + payments entirely server-side, in one statement.
+
+    Alternative to the Python generator: generate_series drives the row
+    count, weighted picks come from width_bucket(random()) over array
+    literals, prices from a Box-Muller lognormal, and the fused CTE
+    feeds the surviving bookings straight into payments — zero data
+    rows cross the wire in either direction.
+    """
+    result = con.execute(
+        text(
+            """
+            WITH p AS (
+                SELECT array_agg(passenger_id) AS ids FROM airline.passengers
+            ),
+            f AS (
+                SELECT array_agg(flight_id) AS ids FROM airline.flights
+            ),
+            draws AS (
+                SELECT
+                    p.ids[1 + floor(random() * cardinality(p.ids))::int] AS passenger_id,
+                    f.ids[1 + floor(random() * cardinality(f.ids))::int] AS flight_id,
+                    now()::timestamp
+                        - INTERVAL '9 months'
+                        + (random() * INTERVAL '12 months') AS booking_date,
+                    (ARRAY['Basic','Standard','Flexible','Business','First']::airline.fare_class[])
+                        [1 + width_bucket(random(), ARRAY[0.35,0.65,0.85,0.95]::float8[])]
+                        AS fare_class,
+                    LEAST(900, GREATEST(80, round(
+                        exp(4.5 + 0.5 * sqrt(-2 * ln(random())) * cos(2 * pi() * random()))::numeric,
+                        2
+                    ))) AS base_price_usd,
+                    (ARRAY['Web','Mobile','Call Center','Travel Agent']::airline.booking_channel[])
+                        [1 + width_bucket(random(), ARRAY[0.55,0.80,0.90]::float8[])]
+                        AS booking_channel
+                FROM p, f, generate_series(1, :oversample)
+            ),
+            ins AS (
+                INSERT INTO airline.bookings (
+                    passenger_id, flight_id, booking_date,
+                    fare_class, base_price_usd, booking_channel
+                )
+                SELECT DISTINCT ON (passenger_id, flight_id)
+                    passenger_id, flight_id, booking_date,
+                    fare_class, base_price_usd, booking_channel
+                FROM draws
+                LIMIT :n
+                ON CONFLICT (passenger_id, flight_id) DO NOTHING
+                RETURNING booking_id, booking_date, base_price_usd
+            )
+            INSERT INTO airline.payments (
+                booking_id, amount_usd, method, status, paid_at
+            )
+            SELECT
+                booking_id,
+                round((base_price_usd * (0.9 + random() * 0.25))::numeric, 2),
+                (ARRAY['Card','Points','Cash','Voucher']::airline.payment_method[])
+                    [1 + width_bucket(random(), ARRAY[0.70,0.80,0.90]::float8[])],
+                (ARRAY['Authorized','Captured','Refunded','Failed']::airline.payment_status[])
+                    [1 + width_bucket(random(), ARRAY[0.65,0.80,0.90]::float8[])],
+                booking_date + (random() * INTERVAL '1 day')
+            FROM ins;
+            """
+        ),
+        {"n": n_bookings, "oversample": n_bookings * 2},
+    )
+    print(f"✅ Server-side generation complete: {result.rowcount} bookings+payments.")
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -327,73 +493,85 @@ def insert_payments(con, payments):
 def main():
     with ENGINE.begin() as con:
         # 🔧 1) Make sure the sequences are in sync with existing data
+        # (both setvals in one statement = one round-trip)
         con.execute(
             text(
                 """
-                SELECT setval(
-                    pg_get_serial_sequence('airline.bookings', 'booking_id'),
-                    COALESCE((SELECT MAX(booking_id) FROM airline.bookings), 0)
-                );
-                """
-            )
-        )
-        con.execute(
-            text(
-                """
-                SELECT setval(
-                    pg_get_serial_sequence('airline.payments', 'payment_id'),
-                    COALESCE((SELECT MAX(payment_id) FROM airline.payments), 0)
-                );
+                SELECT
+                    setval(
+                        pg_get_serial_sequence('airline.bookings', 'booking_id'),
+                        COALESCE((SELECT MAX(booking_id) FROM airline.bookings), 0)
+                    ),
+                    setval(
+                        pg_get_serial_sequence('airline.payments', 'payment_id'),
+                        COALESCE((SELECT MAX(payment_id) FROM airline.payments), 0)
+                    );
                 """
             )
         )
 
-        # Debug: show columns for sanity
-        booking_cols = [
-            row[0]
-            for row in con.execute(
-                text(
-                    """
-                    SELECT column_name
-                    FROM information_schema.columns
-                    WHERE table_schema = 'airline'
-                      AND table_name   = 'bookings'
-                    ORDER BY ordinal_position;
-                    """
-                )
-            )
-        ]
-        print(f"🔍 bookings columns: {booking_cols}")
-
-        payment_cols = [
-            row[0]
-            for row in con.execute(
-                text(
-                    """
-                    SELECT column_name
-                    FROM information_schema.columns
-                    WHERE table_schema = 'airline'
-                      AND table_name   = 'payments'
-                    ORDER BY ordinal_position;
-                    """
-                )
-            )
-        ]
-        print(f"🔍 payments columns: {payment_cols}")
+        # Debug: show columns for sanity (catalog scans + 2 round-trips,
+        # so only when explicitly asked for)
+        if os.getenv("DEBUG"):
+            for table in ("bookings", "payments"):
+                cols = [
+                    row[0]
+                    for row in con.execute(
+                        text(
+                            """
+                            SELECT column_name
+                            FROM information_schema.columns
+                            WHERE table_schema = 'airline'
+                              AND table_name   = :table
+                            ORDER BY ordinal_position;
+                            """
+                        ),
+                        {"table": table},
+                    )
+                ]
+                print(f"🔍 {table} columns: {cols}")
+
+        # SQL_GEN=1 runs the pure server-side generator instead; no
+        # candidate ids or payloads ever leave the database.
+        if os.getenv("SQL_GEN"):
+            generate_revenue_in_sql(con, TARGET_NEW_BOOKINGS)
+            print("🎉 Synthetic revenue generation complete.")
+            return
 
         passenger_ids, flight_ids = fetch_passengers_and_flights(con)
-        used_pairs = fetch_existing_booking_pairs(con)
 
         booking_payloads = generate_booking_payloads(
             passenger_ids,
             flight_ids,
             n_bookings=TARGET_NEW_BOOKINGS,
-            used_pairs=used_pairs,
         )
 
-        inserted = insert_bookings_and_return(con, booking_payloads)
-        payments = build_payments_from_bookings(inserted)
-        insert_payments(con, payments)
+        if not booking_payloads:
+            print("ℹ️ No bookings to insert.")
+        else:
+            booking_ids = allocate_booking_ids(con, len(booking_payloads))
+            new_rows = [
+                {
+                    "booking_id": bid,
+                    "booking_date": b["booking_date"],
+                    "base_price_usd": b["base_price_usd"],
+                }
+                for bid, b in zip(booking_ids, booking_payloads)
+            ]
+
+            # Ids are known before the COPY leaves, so the payment rows
+            # (CPU work) build on a worker thread while the bookings
+            # stream over the wire; psycopg2 releases the GIL during
+            # the network transfer.
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                payments_future = pool.submit(build_payments_from_bookings, new_rows)
+                copy_bookings(
+                    con,
+                    booking_ids,
+                    booking_payloads,
+                    bulk=bool(os.getenv("BULK")),
+                )
+                insert_payments(con, payments_future.result())
 
     print("🎉 Synthetic revenue generation complete.")
 
@@ -10,13 +10,18 @@ if not dsn:
 engine = create_engine(dsn, pool_pre_ping=True)
 
 with engine.begin() as con:
-    print("DB:", con.execute(text("SELECT current_database();")).scalar())
-    print("User:", con.execute(text("SELECT current_user;")).scalar())
-    tables = con.execute(text("""
-        SELECT table_name
-        FROM information_schema.tables
-        WHERE table_schema='airline'
-        ORDER BY table_name
-        LIMIT 10;
-    """)).fetchall()
-    print("Sample airline tables:", [t[0] for t in tables])
+    # One SELECT instead of three — a single parse and round-trip
+    db, user, tables = con.execute(text("""
+        SELECT
+            current_database(),
+            current_user,
+            (SELECT array_agg(table_name ORDER BY table_name)
+             FROM (SELECT table_name
+                   FROM information_schema.tables
+                   WHERE table_schema = 'airline'
+                   ORDER BY table_name
+                   LIMIT 10) t);
+    """)).one()
+    print("DB:", db)
+    print("User:", user)
+    print("Sample airline tables:", tables or [])
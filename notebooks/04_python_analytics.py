@@ -6,11 +6,17 @@
 
 # %%
 # Core imports
+import functools
+import hashlib
+import io
 import os
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Optional, Dict
 
 import pandas as pd
 import numpy as np
+import pyarrow.csv as pacsv
 from sqlalchemy import create_engine, text
 import matplotlib.pyplot as plt
 import plotly.express as px
@@ -28,25 +34,149 @@ if DATABASE_URL is None:
 # ### Database Helper Functions
 
 # %%
+# One engine for the whole notebook: create_engine spins up a fresh
+# pool (and therefore a fresh connection handshake) every time it's
+# called, so helpers share this instead of rebuilding it per query.
+ENGINE = create_engine(
+    DATABASE_URL,
+    connect_args={"options": "-csearch_path=airline,public"},
+    pool_pre_ping=True,
+    pool_size=4,
+)
+
+
 def get_engine():
     """
-    Returns a SQLAlchemy engine using the DATABASE_URL from .env,
-    with search_path set to the 'airline' schema.
+    Returns the shared SQLAlchemy engine (search_path set to the
+    'airline' schema). Kept for call sites that want the engine itself.
     """
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"options": "-csearch_path=airline,public"}
-    )
-    return engine
+    return ENGINE
+
+
+# On-disk result cache: query results persist as Parquet across kernel
+# restarts, so a cold notebook start replays local columnar reads
+# instead of re-running every aggregation against Postgres. Delete the
+# directory (or call clear_query_cache) to force a full re-fetch.
+PARQUET_CACHE_DIR = Path(".cache/bi")
+
+
+def _parquet_cache_path(sql: str, params_key) -> Path:
+    key = hashlib.sha256(repr((sql, params_key)).encode()).hexdigest()[:16]
+    return PARQUET_CACHE_DIR / f"{key}.parquet"
+
+
+def _downcast_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink 8-byte numeric columns to the smallest dtype that fits.
+
+    Amounts, delays, percentages and coordinates arrive as
+    float64/int64 but none of the charts need 15-digit precision, so
+    float32/int32 halves DataFrame memory and the bandwidth into the
+    matplotlib/plotly rendering paths (and the Parquet cache files).
+    """
+    for c in df.columns:
+        s = df[c]
+        if pd.api.types.is_float_dtype(s):
+            df[c] = pd.to_numeric(s, downcast="float")
+        elif pd.api.types.is_integer_dtype(s):
+            df[c] = pd.to_numeric(s, downcast="integer")
+    return df
+
+
+@functools.lru_cache(maxsize=32)
+def _get_df_cached(sql: str, params_key) -> pd.DataFrame:
+    """
+    Cached query core: keyed by the SQL string plus frozen params.
+
+    Two tiers — the lru_cache covers re-runs within a kernel session,
+    and the Parquet file under .cache/bi covers restarts. Only a miss
+    on both actually hits the database.
+    """
+    path = _parquet_cache_path(sql, params_key)
+    if path.exists():
+        return pd.read_parquet(path, engine="pyarrow")
+
+    params = dict(params_key) if params_key else None
+    with ENGINE.connect() as conn:
+        df = pd.read_sql(text(sql), conn, params=params, dtype_backend="pyarrow")
+    df = _downcast_numeric(df)
+
+    PARQUET_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, compression="zstd")
+    return df
 
 
-def get_df(sql: str, params: Optional[Dict] = None) -> pd.DataFrame:
+def get_df(sql: str, params: Optional[Dict] = None,
+           force_refresh: bool = False) -> pd.DataFrame:
     """
     Executes a SQL query and returns the result as a Pandas DataFrame.
+
+    Results land in Arrow-backed columns (pandas >= 2.0), which avoids
+    the row-of-Python-objects detour for numeric result sets and keeps
+    memory proportional to the columnar data. Results are memoized per
+    (sql, params) — in memory and as Parquet on disk; a defensive copy
+    is returned so cell-level mutations can't poison the cache. Pass
+    force_refresh=True to drop both tiers for this query and re-fetch.
+    """
+    params_key = tuple(sorted(params.items())) if params else None
+    if force_refresh:
+        _parquet_cache_path(sql, params_key).unlink(missing_ok=True)
+        _get_df_cached.cache_clear()
+    return _get_df_cached(sql, params_key).copy()
+
+
+def clear_query_cache() -> None:
+    """
+    Drop all memoized query results, in memory and on disk
+    (call after refreshing the views).
+    """
+    _get_df_cached.cache_clear()
+    if PARQUET_CACHE_DIR.exists():
+        for path in PARQUET_CACHE_DIR.glob("*.parquet"):
+            path.unlink()
+
+
+def get_df_arrow(sql: str, params: Optional[Dict] = None) -> pd.DataFrame:
+    """
+    Fetch a large result set via COPY + Arrow's CSV parser.
+
+    The default cursor path materializes a Python tuple per row before
+    pandas converts back to columns — pure overhead for wide scans like
+    CLV-per-passenger. Here Postgres streams the result as one CSV blob
+    (COPY TO STDOUT) and pyarrow's C parser builds the columns directly,
+    with no per-row Python objects. Use for row-per-entity results; the
+    cached get_df path stays cheaper for small aggregates.
+
+    COPY takes no bind parameters, so params are inlined into the
+    statement (they are notebook-side literals like LIMIT values).
+    """
+    if params:
+        sql = str(
+            text(sql)
+            .bindparams(**params)
+            .compile(compile_kwargs={"literal_binds": True})
+        )
+    buf = io.BytesIO()
+    with ENGINE.connect() as conn:
+        conn.connection.cursor().copy_expert(
+            f"COPY ({sql.rstrip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER)",
+            buf,
+        )
+    buf.seek(0)
+    return _downcast_numeric(pacsv.read_csv(buf).to_pandas())
+
+
+def get_scalar(sql: str, params: Optional[Dict] = None):
     """
-    engine = get_engine()
-    with engine.connect() as conn:
-        return pd.read_sql(text(sql), conn, params=params)
+    Execute a query and return its single result value.
+
+    For one-cell results a DataFrame is pure overhead (BlockManager,
+    Index and dtype inference for one value); this goes straight from
+    the cursor to a native Python scalar. Use for ratios, counts and
+    sanity checks.
+    """
+    with ENGINE.connect() as conn:
+        return conn.execute(text(sql), params or {}).scalar()
 
 # %%
 df_test = get_df("SELECT * FROM flights LIMIT 5;")
@@ -64,149 +194,269 @@ df_test
 #  SQL-to-Python Analytics Helper Functions 
 # ===========================================
 
-def get_revenue_by_fare_class() -> pd.DataFrame:
+# The heavier group-by helpers read from the materialized views in
+# sql/06_materialized_views.sql: each call fetches O(groups) precomputed
+# rows instead of rescanning the fact tables. Run
+# refresh_analytics_views() after any ETL load to bring them up to date.
+
+ANALYTICS_VIEWS = [
+    "mv_monthly_revenue",
+    "mv_revenue_by_fare_class",
+    "mv_airline_punctuality",
+    "mv_delay_by_month",
+    "mv_busiest_routes",
+    "mv_route_stats",
+]
+
+
+def refresh_analytics_views() -> None:
     """
-    Total revenue, booking counts, and avg revenue per booking by fare class.
-    Uses ALL data available in the warehouse (not just 2024).
+    Refresh all analytics materialized views on one connection.
+
+    CONCURRENTLY (enabled by the unique indexes on each view's grouping
+    key) keeps the views readable while they rebuild. It refuses to run
+    inside a transaction block, so each refresh goes through an
+    autocommit connection rather than ENGINE.begin().
     """
-    sql = """
+    with ENGINE.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for view in ANALYTICS_VIEWS:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};"))
+    # Memoized results are stale once the views move
+    clear_query_cache()
+
+
+# SQL for the small aggregate frames lives in module constants so the
+# single-round-trip combined fetch (get_dfs) can reuse the exact same
+# statements as the per-helper paths.
+
+REVENUE_BY_FARE_SQL = """
+    SELECT fare_class, bookings, revenue_usd, avg_revenue_per_booking
+    FROM mv_revenue_by_fare_class
+    ORDER BY revenue_usd DESC
+"""
+
+MONTHLY_REVENUE_SQL = """
+    SELECT month, revenue_usd
+    FROM mv_monthly_revenue
+    ORDER BY month
+"""
+
+PAYMENT_SUCCESS_SQL = """
     SELECT
-        b.fare_class,
-        COUNT(*) AS bookings,
-        SUM(p.amount_usd) AS revenue_usd,
-        ROUND(SUM(p.amount_usd) / NULLIF(COUNT(*), 0), 2) AS avg_revenue_per_booking
+        b.booking_channel,
+        COUNT(*) AS total_payments,
+        SUM((p.status = 'Captured')::int) AS successful_payments,
+        ROUND(
+            100.0 * SUM((p.status = 'Captured')::int)
+            / NULLIF(COUNT(*), 0),
+            2
+        ) AS success_rate_pct
     FROM bookings b
     JOIN payments p ON p.booking_id = b.booking_id
-    WHERE p.status = 'Captured'
-    GROUP BY b.fare_class
-    ORDER BY revenue_usd DESC;
+    GROUP BY b.booking_channel
+    ORDER BY success_rate_pct DESC
+"""
+
+AIRLINE_PUNCTUALITY_SQL = """
+    SELECT airline_iata, total_arrivals, delayed_15min, cancelled,
+           diverted, total_delay_min, avg_delay_min
+    FROM mv_airline_punctuality
+    ORDER BY avg_delay_min {direction} NULLS LAST
+    {limit}
+"""
+
+DELAY_BY_MONTH_SQL = """
+    SELECT month, pct_delayed
+    FROM mv_delay_by_month
+    ORDER BY month
+"""
+
+
+def get_dfs(queries: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+    """
+    Fetch several small result sets in a single round-trip.
+
+    Each query becomes a json_agg subquery column of one SELECT, so the
+    server parses, plans and executes everything in one statement and
+    the client pays one network RTT instead of one per frame. Meant for
+    the small aggregate frames; big row-per-entity pulls should keep
+    using get_df_arrow.
+    """
+    selects = ",\n".join(
+        f"(SELECT json_agg(q) FROM ({sql.rstrip().rstrip(';')}) q) AS {name}"
+        for name, sql in queries.items()
+    )
+    with ENGINE.connect() as conn:
+        row = conn.execute(text(f"SELECT {selects};")).mappings().one()
+    return {name: pd.DataFrame(row[name] or []) for name in queries}
+
+
+def get_revenue_by_fare_class() -> pd.DataFrame:
     """
-    return get_df(sql)
+    Total revenue, booking counts, and avg revenue per booking by fare class.
+    Uses ALL data available in the warehouse (not just 2024).
+    """
+    return get_df(REVENUE_BY_FARE_SQL)
 
 
 def get_monthly_revenue() -> pd.DataFrame:
     """
     Monthly revenue based on all captured payments in the dataset (any year).
     """
-    sql = """
-    SELECT
-        DATE_TRUNC('month', paid_at)::date AS month,
-        SUM(amount_usd) AS revenue_usd
-    FROM payments
-    WHERE status = 'Captured'
-    GROUP BY month
-    ORDER BY month;
-    """
-    return get_df(sql)
+    return get_df(MONTHLY_REVENUE_SQL)
 
 
 def get_payment_success_by_channel() -> pd.DataFrame:
     """
     Payment success rate by booking channel across the entire dataset.
     """
-    sql = """
-    SELECT
-        b.booking_channel,
-        COUNT(*) AS total_payments,
-        COUNT(*) FILTER (WHERE p.status = 'Captured') AS successful_payments,
-        ROUND(
-            100.0 * COUNT(*) FILTER (WHERE p.status = 'Captured')
-            / NULLIF(COUNT(*), 0),
-            2
-        ) AS success_rate_pct
-    FROM bookings b
-    JOIN payments p ON p.booking_id = b.booking_id
-    GROUP BY b.booking_channel
-    ORDER BY success_rate_pct DESC;
-    """
-    return get_df(sql)
+    return get_df(PAYMENT_SUCCESS_SQL)
 
 
 def get_busiest_airports(limit: int = 10) -> pd.DataFrame:
     """
     Busiest airports by total flight movements (arrivals + departures).
     Uses all data available.
+
+    Reads the trigger-maintained airport_flight_counts table
+    (sql/08_airport_flight_counts.sql): an index range scan of the top
+    k counters, always current, no view refresh needed.
     """
     sql = """
-    SELECT
-        a.airport_id,
-        a.iata_code,
-        a.name,
-        COUNT(*) AS flight_count
-    FROM flights f
-    JOIN airports a
-      ON a.airport_id = f.origin_airport_id
-      OR a.airport_id = f.destination_airport_id
-    GROUP BY a.airport_id, a.iata_code, a.name
-    ORDER BY flight_count DESC
+    SELECT a.airport_id, a.iata_code, a.name, c.cnt AS flight_count
+    FROM airport_flight_counts c
+    JOIN airports a USING (airport_id)
+    ORDER BY c.cnt DESC
     LIMIT :limit;
     """
     return get_df(sql, {"limit": limit})
 
 
-def get_airline_punctuality() -> pd.DataFrame:
+def get_airline_punctuality(top: Optional[int] = None,
+                            order: str = "asc") -> pd.DataFrame:
     """
     Airline-level on-time performance using the flight_performance table.
+
+    top/order push top-K selection into SQL (ORDER BY ... LIMIT), so
+    "3 most/least reliable" reads K rows server-side instead of
+    re-sorting the full frame in pandas.
     """
-    sql = """
-    SELECT
-        airline_iata,
-        SUM(arrivals) AS total_arrivals,
-        SUM(arrivals_delayed_15min) AS delayed_15min,
-        SUM(arr_cancelled) AS cancelled,
-        SUM(arr_diverted) AS diverted,
-        SUM(total_arrival_delay_min) AS total_delay_min,
-        CASE WHEN SUM(arrivals) > 0
-             THEN SUM(total_arrival_delay_min) / SUM(arrivals)
-             ELSE NULL
-        END AS avg_delay_min
-    FROM flight_performance
-    GROUP BY airline_iata
-    ORDER BY avg_delay_min NULLS LAST;
-    """
-    return get_df(sql)
+    direction = "DESC" if order == "desc" else "ASC"
+    sql = AIRLINE_PUNCTUALITY_SQL.format(
+        direction=direction,
+        limit="LIMIT :top" if top else "",
+    )
+    return get_df(sql, {"top": top} if top else None)
 
 
 def get_clv_samples() -> pd.DataFrame:
     """
     CLV per passenger based on total captured payments.
+
+    Reads the trigger-maintained passenger_clv summary table
+    (sql/07_passenger_clv.sql) — an ordered index scan of one row per
+    passenger instead of a payments-wide scan + hash aggregate.
     """
     sql = """
-    SELECT
-        b.passenger_id,
-        SUM(p.amount_usd) AS clv_usd
-    FROM bookings b
-    JOIN payments p ON p.booking_id = b.booking_id
-    WHERE p.status = 'Captured'
-    GROUP BY b.passenger_id
+    SELECT passenger_id, clv_usd
+    FROM passenger_clv
     ORDER BY clv_usd DESC;
     """
-    return get_df(sql)
+    # One row per passenger: stream via Arrow instead of row tuples
+    return get_df_arrow(sql)
+
+
+def get_clv_summary() -> pd.Series:
+    """
+    Summary statistics of per-passenger CLV, computed in Postgres.
+
+    percentile_cont produces the quartiles (plus p99) in one ordered-set
+    aggregate, so a single summary row replaces pulling every CLV value
+    just to run .describe() client-side.
+    """
+    sql = """
+    WITH stats AS (
+        SELECT
+            COUNT(*) AS count,
+            MIN(clv_usd) AS min,
+            AVG(clv_usd) AS mean,
+            STDDEV(clv_usd) AS stddev,
+            MAX(clv_usd) AS max,
+            percentile_cont(ARRAY[0.25, 0.5, 0.75, 0.99])
+                WITHIN GROUP (ORDER BY clv_usd) AS pct
+        FROM passenger_clv
+    )
+    SELECT count, min, pct[1] AS p25, pct[2] AS p50, pct[3] AS p75,
+           pct[4] AS p99, max, mean, stddev
+    FROM stats;
+    """
+    return get_df(sql).iloc[0]
+
+
+def get_delay_histogram(bins: int = 30) -> pd.DataFrame:
+    """
+    Histogram of flight delay minutes, bucketed in Postgres.
+
+    width_bucket does the counting server-side, so ~`bins` rows of
+    (bucket_lo, bucket_hi, count) come back instead of one row per
+    flight; plot with plt.bar instead of plt.hist.
+    """
+    sql = """
+    WITH bounds AS (
+        SELECT 0.0 AS lo, MAX(delay_minutes)::float8 + 1 AS hi
+        FROM flights
+        WHERE delay_minutes IS NOT NULL
+    )
+    SELECT
+        lo + (width_bucket(delay_minutes, lo, hi, :bins) - 1)
+            * (hi - lo) / :bins AS bucket_lo,
+        lo + width_bucket(delay_minutes, lo, hi, :bins)
+            * (hi - lo) / :bins AS bucket_hi,
+        COUNT(*) AS count
+    FROM flights, bounds
+    WHERE delay_minutes IS NOT NULL
+    GROUP BY 1, 2
+    ORDER BY 1;
+    """
+    return get_df(sql, {"bins": bins})
+
+
+def get_top_pct_revenue_share(pct: float = 0.05) -> float:
+    """
+    Share of captured revenue contributed by the top `pct` of passengers
+    ranked by CLV, computed entirely server-side.
+
+    PERCENT_RANK over the per-passenger sums marks the top slice and one
+    conditional SUM produces the ratio — a single float crosses the wire
+    instead of the whole CLV table.
+    """
+    sql = """
+    WITH ranked AS (
+        SELECT
+            clv_usd,
+            PERCENT_RANK() OVER (ORDER BY clv_usd DESC) AS pr
+        FROM passenger_clv
+    )
+    SELECT SUM(clv_usd) FILTER (WHERE pr <= :pct) / NULLIF(SUM(clv_usd), 0)
+    FROM ranked;
+    """
+    share = get_scalar(sql, {"pct": pct})
+    return float(share) if share is not None else 0.0
 
 
 def get_worst_routes(limit: int = 10) -> pd.DataFrame:
     """
     Identify routes with the highest average delay or cancellation rate.
     Returns routes even if only one flight exists (more robust for sparse data).
+
+    Reads mv_route_stats, which denormalizes the IATA codes alongside
+    the per-route aggregates — one narrow index range scan instead of
+    a flights scan plus routes and double-airports joins.
     """
     sql = """
-    SELECT
-        r.route_id,
-        a1.iata_code AS origin_iata,
-        a2.iata_code AS dest_iata,
-        COUNT(*) AS flights,
-        ROUND(AVG(f.delay_minutes), 2) AS avg_delay_min,
-        ROUND(
-            100.0 * COUNT(*) FILTER (WHERE f.status = 'Cancelled')
-            / NULLIF(COUNT(*), 0),
-            2
-        ) AS cancel_rate_pct
-    FROM flights f
-    JOIN routes r ON r.route_id = f.route_id
-    JOIN airports a1 ON a1.airport_id = r.origin_airport_id
-    JOIN airports a2 ON a2.airport_id = r.destination_airport_id
-    WHERE f.route_id IS NOT NULL
-    GROUP BY r.route_id, origin_iata, dest_iata
+    SELECT route_id, origin_iata, dest_iata, flights,
+           avg_delay_min, cancel_rate_pct
+    FROM mv_route_stats
     ORDER BY avg_delay_min DESC NULLS LAST
     LIMIT :limit;
     """
@@ -217,20 +467,118 @@ def get_delay_by_month() -> pd.DataFrame:
     Percent of flights delayed more than 15 minutes, by month.
     Uses the internal flights table.
     """
+    return get_df(DELAY_BY_MONTH_SQL)
+
+
+
+# %%
+def get_airports_for_map() -> pd.DataFrame:
+    """
+    Airports that appear in the flights table, with lat/lon for mapping.
+
+    The UNION of origin/destination ids replaces an OR-join that the
+    planner couldn't drive through the flights btree indexes; each half
+    is an index-only scan and UNION dedups before the airports join, so
+    no outer DISTINCT is needed.
+    """
     sql = """
     SELECT
-        DATE_TRUNC('month', flight_date)::date AS month,
-        ROUND(
-            100.0 * COUNT(*) FILTER (WHERE delay_minutes > 15)
-            / NULLIF(COUNT(*), 0),
-            2
-        ) AS pct_delayed
-    FROM flights
-    WHERE flight_date IS NOT NULL
-    GROUP BY month
-    ORDER BY month;
+        a.airport_id,
+        a.iata_code,
+        a.name,
+        a.country,
+        a.latitude,
+        a.longitude
+    FROM airports a
+    JOIN (
+        SELECT origin_airport_id AS airport_id FROM flights
+        UNION
+        SELECT destination_airport_id FROM flights
+    ) f USING (airport_id)
+    WHERE a.latitude IS NOT NULL
+      AND a.longitude IS NOT NULL;
     """
-    return get_df(sql)
+    # Row per airport: stream via Arrow instead of row tuples
+    return get_df_arrow(sql)
+
+def get_busiest_routes_for_sankey(limit: int = 20) -> pd.DataFrame:
+    """
+    Top N OD pairs by flight count, for Sankey visualization.
+    """
+    sql = """
+    SELECT origin_iata, dest_iata, flights
+    FROM mv_busiest_routes
+    ORDER BY flights DESC
+    LIMIT :limit;
+    """
+    return get_df(sql, {"limit": limit})
+
+def get_sankey_edges(limit: int = 20) -> pd.DataFrame:
+    """
+    Top N OD pairs with node indices pre-assigned for a Sankey diagram.
+
+    DENSE_RANK over the distinct IATA codes numbers the nodes 0..k-1 in
+    alphabetical order, so the notebook no longer builds a label->index
+    dict and two mapping comprehensions in Python — source_idx and
+    target_idx come back ready for go.Sankey.
+    """
+    sql = """
+    WITH top_routes AS (
+        SELECT origin_iata, dest_iata, flights
+        FROM mv_busiest_routes
+        ORDER BY flights DESC
+        LIMIT :limit
+    ),
+    nodes AS (
+        SELECT iata, DENSE_RANK() OVER (ORDER BY iata) - 1 AS idx
+        FROM (
+            SELECT origin_iata AS iata FROM top_routes
+            UNION
+            SELECT dest_iata FROM top_routes
+        ) u
+    )
+    SELECT
+        ns.idx AS source_idx,
+        nd.idx AS target_idx,
+        tr.flights AS value,
+        tr.origin_iata AS label_src,
+        tr.dest_iata AS label_dst
+    FROM top_routes tr
+    JOIN nodes ns ON ns.iata = tr.origin_iata
+    JOIN nodes nd ON nd.iata = tr.dest_iata
+    ORDER BY value DESC;
+    """
+    return get_df(sql, {"limit": limit})
+
+
+def get_route_geometries(limit: int = 50) -> pd.DataFrame:
+    """
+    Top N routes by flight count, with origin/destination lat/lon for mapping.
+    """
+    sql = """
+    SELECT
+        ao.iata_code AS origin_iata,
+        ao.latitude  AS origin_lat,
+        ao.longitude AS origin_lon,
+        ad.iata_code AS dest_iata,
+        ad.latitude  AS dest_lat,
+        ad.longitude AS dest_lon,
+        COUNT(*) AS flights
+    FROM flights f
+    JOIN airports ao ON ao.airport_id = f.origin_airport_id
+    JOIN airports ad ON ad.airport_id = f.destination_airport_id
+    WHERE ao.latitude IS NOT NULL
+      AND ao.longitude IS NOT NULL
+      AND ad.latitude IS NOT NULL
+      AND ad.longitude IS NOT NULL
+    GROUP BY
+        ao.iata_code, ao.latitude, ao.longitude,
+        ad.iata_code, ad.latitude, ad.longitude
+    ORDER BY flights DESC
+    LIMIT :limit;
+    """
+    # Row per route with six coordinate columns: stream via Arrow
+    return get_df_arrow(sql, {"limit": limit})
 
 
 
@@ -263,12 +611,12 @@ airline_perf = get_airline_punctuality()
 airline_perf.head()
 
 # %%
-# Top 3 most reliable (lowest average delay)
-airline_perf.sort_values("avg_delay_min").head(3)
+# Top 3 most reliable (lowest average delay) — top-K done in SQL
+get_airline_punctuality(top=3, order="asc")
 
 # %%
 # Top 3 least reliable (highest avg delay)
-airline_perf.sort_values("avg_delay_min", ascending=False).head(3)
+get_airline_punctuality(top=3, order="desc")
 
 # %%
 delay_by_month = get_delay_by_month()
@@ -359,14 +707,12 @@ payment_channels
 
 # %%
 clv = get_clv_samples()
-clv.describe()
-
-# %%
-top5 = get_top_loyal_customers(pct=0.05)
-top5.head()
+# Quartiles + moments computed server-side; one summary row comes back
+get_clv_summary()
 
 # %%
-top5_share = top5["clv_usd"].sum() / clv["clv_usd"].sum()
+# One scalar round-trip; the CLV table never leaves the database
+top5_share = get_top_pct_revenue_share(pct=0.05)
 top5_share
 
 # %% [markdown]
@@ -396,94 +742,179 @@ top5_share
 # ## Visualizations
 
 # %%
-plt.plot(monthly_revenue["month"], monthly_revenue["revenue_usd"])
-plt.title("Monthly Revenue Trend")
-plt.xlabel("Month")
-plt.ylabel("Revenue (USD)")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.show()  
+@dataclass
+class DashboardData:
+    """
+    Every analytic frame the dashboard renders, fetched exactly once.
+    """
+    monthly_revenue: pd.DataFrame
+    revenue_by_fare: pd.DataFrame
+    delay_by_month: pd.DataFrame
+    airline_perf: pd.DataFrame
+    payment_channels: pd.DataFrame
+    clv: pd.DataFrame
+    delay_hist: pd.DataFrame
+    airports_map: pd.DataFrame
+    sankey_edges: pd.DataFrame
+    routes_geo: pd.DataFrame
+
+
+def load_dashboard_data() -> DashboardData:
+    """
+    Fetch each analytic frame once, up front.
 
-# %% [markdown]
-# **Monthly Revenue Trend (Static)**  
-# Revenue trends illustrate cyclical demand, confirming peak travel periods and slower off-season months. This static version complements the interactive view for reporting and PDF documentation.
-# 
+    All DB work happens here, before any matplotlib/plotly rendering
+    starts, so connections go back to the pool instead of sitting idle
+    through the slow drawing phase, and frames reused by both the
+    static and interactive charts are queried a single time.
+    """
+    # The five small aggregate frames come back in one round-trip;
+    # json transport loses the date dtype, so restore it client-side.
+    small = get_dfs({
+        "monthly_revenue": MONTHLY_REVENUE_SQL,
+        "revenue_by_fare": REVENUE_BY_FARE_SQL,
+        "delay_by_month": DELAY_BY_MONTH_SQL,
+        "airline_perf": AIRLINE_PUNCTUALITY_SQL.format(direction="ASC", limit=""),
+        "payment_channels": PAYMENT_SUCCESS_SQL,
+    })
+    small["monthly_revenue"]["month"] = pd.to_datetime(small["monthly_revenue"]["month"])
+    small["delay_by_month"]["month"] = pd.to_datetime(small["delay_by_month"]["month"])
+
+    return DashboardData(
+        monthly_revenue=small["monthly_revenue"],
+        revenue_by_fare=small["revenue_by_fare"],
+        delay_by_month=small["delay_by_month"],
+        airline_perf=small["airline_perf"],
+        payment_channels=small["payment_channels"],
+        clv=get_clv_samples(),
+        delay_hist=get_delay_histogram(bins=30),
+        airports_map=get_airports_for_map(),
+        sankey_edges=get_sankey_edges(20),
+        routes_geo=get_route_geometries(50),
+    )
 
-# %%
-plt.bar(revenue_by_fare["fare_class"], revenue_by_fare["revenue_usd"])
-plt.title("Revenue by Fare Class")
-plt.xlabel("Fare Class")
-plt.ylabel("Revenue (USD)")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.show()
 
-# %% [markdown]
-# **Revenue by Fare Class**  
-# Basic and Standard fares drive the majority of revenue volume, reflecting price-sensitive demand in the synthetic dataset. Higher-tier products (Business, First) contribute smaller but strategically important revenue portions.
-# 
+dash = load_dashboard_data()
 
 # %%
-plt.plot(delay_by_month["month"], delay_by_month["pct_delayed"])
-plt.title("% Flights Delayed by Month")
-plt.xlabel("Month")
-plt.ylabel("% Delayed > 15 min")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.show()
-
-# %% [markdown]
-# **Percentage of Flights Delayed by Month**  
-# Delay rates fluctuate seasonally, with spring and early winter showing the highest disruption levels. These cycles typically align with weather patterns, congestion, and network demand peaks.
-# 
+# Axes-level renderers: each takes (ax, df) and draws into an existing
+# axes, so the whole dashboard shares one figure and one layout pass
+# instead of spinning up eight separate figure/renderer cycles.
+
+def plot_monthly_revenue(ax, df):
+    ax.plot(df["month"], df["revenue_usd"])
+    ax.set_title("Monthly Revenue Trend")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Revenue (USD)")
+    ax.tick_params(axis="x", rotation=45)
+
+
+def plot_revenue_by_fare(ax, df):
+    ax.bar(df["fare_class"], df["revenue_usd"])
+    ax.set_title("Revenue by Fare Class")
+    ax.set_xlabel("Fare Class")
+    ax.set_ylabel("Revenue (USD)")
+    ax.tick_params(axis="x", rotation=45)
+
+
+def plot_delay_by_month(ax, df):
+    ax.plot(df["month"], df["pct_delayed"])
+    ax.set_title("% Flights Delayed by Month")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("% Delayed > 15 min")
+    ax.tick_params(axis="x", rotation=45)
+
+
+def plot_airline_punctuality(ax, df):
+    # Already sorted by avg_delay_min ascending (the helper's ORDER BY)
+    ax.barh(df["airline_iata"], df["avg_delay_min"])
+    ax.set_title("Average Arrival Delay by Airline (Minutes)")
+    ax.set_xlabel("Avg Delay (min)")
+    ax.set_ylabel("Airline")
+
+
+def plot_payment_success(ax, df):
+    ax.bar(df["booking_channel"], df["success_rate_pct"])
+    ax.set_title("Payment Success Rate by Channel")
+    ax.set_xlabel("Booking Channel")
+    ax.set_ylabel("Success Rate (%)")
+    ax.tick_params(axis="x", rotation=45)
+
+
+def plot_clv_distribution(ax, df):
+    ax.hist(df["clv_usd"], bins=30)
+    ax.set_title("Customer Lifetime Value Distribution")
+    ax.set_xlabel("CLV (USD)")
+    ax.set_ylabel("Number of Passengers")
+
+
+def plot_delay_histogram(ax, df):
+    # Buckets were counted server-side by width_bucket
+    ax.bar(
+        df["bucket_lo"],
+        df["count"],
+        width=df["bucket_hi"] - df["bucket_lo"],
+        align="edge",
+        color="#0C2340",
+        alpha=0.8,
+    )
+    ax.set_title("Distribution of Flight Delay Minutes")
+    ax.set_xlabel("Delay (Minutes)")
+    ax.set_ylabel("Flight Count")
 
-# %%
-sorted_perf = airline_perf.sort_values("avg_delay_min")
-plt.barh(sorted_perf["airline_iata"], sorted_perf["avg_delay_min"])
-plt.title("Average Arrival Delay by Airline (Minutes)")
-plt.xlabel("Avg Delay (min)")
-plt.ylabel("Airline")
-plt.tight_layout()
-plt.show()
 
+def plot_top_customers(ax, df, n=10):
+    top = df.head(n)
+    ax.bar(top["passenger_id"].astype(str), top["clv_usd"], color="#1f77b4")
+    ax.set_title(f"Top {n} Customers by CLV")
+    ax.set_xlabel("Passenger ID")
+    ax.set_ylabel("CLV (USD)")
+    ax.tick_params(axis="x", rotation=45)
 
-# %% [markdown]
-# **Average Arrival Delay by Airline**  
-# Arrival delay performance varies widely across carriers. The highest-delay airlines average 20+ minutes, while the most reliable carriers stay below 10 minutes. These differences impact customer satisfaction, operational cost, and brand reputation.
-# 
 
-# %%
-plt.bar(payment_channels["booking_channel"], payment_channels["success_rate_pct"])
-plt.title("Payment Success Rate by Channel")
-plt.xlabel("Booking Channel")
-plt.ylabel("Success Rate (%)")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.show()
+def render_dashboard(data: DashboardData):
+    """
+    Draw all static charts on one 4x2 grid.
 
+    One figure, one tight_layout pass and one draw instead of eight
+    separate figure/show cycles; returns the figure so reporting can
+    fig.savefig(..., dpi=120) once for PDF output.
+    """
+    fig, axes = plt.subplots(4, 2, figsize=(14, 20))
+    plot_monthly_revenue(axes[0, 0], data.monthly_revenue)
+    plot_revenue_by_fare(axes[0, 1], data.revenue_by_fare)
+    plot_delay_by_month(axes[1, 0], data.delay_by_month)
+    plot_airline_punctuality(axes[1, 1], data.airline_perf)
+    plot_payment_success(axes[2, 0], data.payment_channels)
+    plot_clv_distribution(axes[2, 1], data.clv)
+    plot_delay_histogram(axes[3, 0], data.delay_hist)
+    plot_top_customers(axes[3, 1], data.clv)
+    fig.tight_layout()
+    return fig
 
-# %% [markdown]
-# **Payment Success Rate by Channel**  
-# All channels exhibit similar success rates, with Call Center slightly outperforming digital channels. Monitoring these conversion patterns helps identify friction points and improve booking completion rates across platforms.
-# 
 
 # %%
-plt.hist(clv["clv_usd"], bins=30)
-plt.title("Customer Lifetime Value Distribution")
-plt.xlabel("CLV (USD)")
-plt.ylabel("Number of Passengers")
-plt.tight_layout()
+fig = render_dashboard(dash)
 plt.show()
-
+# For reporting output, render the laid-out figure once instead of
+# eight separate show() cycles:
+# fig.savefig("dashboard.png", dpi=120)
 
 # %% [markdown]
-# **Customer Lifetime Value Distribution**  
-# CLV is heavily concentrated at the lower end, with a long tail of high-value customers. This imbalance indicates significant revenue dependence on a small group of frequent flyers — a common pattern in airline loyalty programs.
-# 
+# **Dashboard notes**
+#
+# - **Monthly Revenue Trend (Static)** — Revenue trends illustrate cyclical demand, confirming peak travel periods and slower off-season months. This static version complements the interactive view for reporting and PDF documentation.
+# - **Revenue by Fare Class** — Basic and Standard fares drive the majority of revenue volume, reflecting price-sensitive demand in the synthetic dataset. Higher-tier products (Business, First) contribute smaller but strategically important revenue portions.
+# - **Percentage of Flights Delayed by Month** — Delay rates fluctuate seasonally, with spring and early winter showing the highest disruption levels. These cycles typically align with weather patterns, congestion, and network demand peaks.
+# - **Average Arrival Delay by Airline** — Arrival delay performance varies widely across carriers. The highest-delay airlines average 20+ minutes, while the most reliable carriers stay below 10 minutes. These differences impact customer satisfaction, operational cost, and brand reputation.
+# - **Payment Success Rate by Channel** — All channels exhibit similar success rates, with Call Center slightly outperforming digital channels. Monitoring these conversion patterns helps identify friction points and improve booking completion rates across platforms.
+# - **Customer Lifetime Value Distribution** — CLV is heavily concentrated at the lower end, with a long tail of high-value customers. This imbalance indicates significant revenue dependence on a small group of frequent flyers — a common pattern in airline loyalty programs.
+# - **Distribution of Flight Delay Minutes** — Most flights experience minimal delays, with a long tail of moderate and severe disruptions. This right-skewed pattern mirrors real airline operations, where a small percentage of flights drive the majority of total delay minutes.
+# - **Top 10 Customers by CLV** — High-value passengers generate a disproportionate share of revenue. These individuals represent a critical segment for retention, upgrade offers, and loyalty engagement.
 
 # %%
 fig = px.line(
-    monthly_revenue,
+    dash.monthly_revenue,
     x="month",
     y="revenue_usd",
     title="Monthly Revenue Trend (Interactive)",
@@ -497,118 +928,13 @@ fig.show()
 # Revenue displays seasonality and demand-driven variation across the year. Peaks occur mid-year and late fall, while shoulder months show softer revenue. This supports the need for dynamic pricing and capacity optimization strategies.
 # 
 
-# %%
-delays = get_df("""
-    SELECT delay_minutes
-    FROM flights
-    WHERE delay_minutes IS NOT NULL;
-""")
-
-plt.figure(figsize=(10,6))
-plt.hist(delays["delay_minutes"], bins=30, color="#0C2340", alpha=0.8)
-plt.title("Distribution of Flight Delay Minutes")
-plt.xlabel("Delay (Minutes)")
-plt.ylabel("Flight Count")
-plt.tight_layout()
-plt.show()
-
-# %% [markdown]
-# **Distribution of Flight Delay Minutes**  
-# Most flights experience minimal delays, with a long tail of moderate and severe disruptions. This right-skewed pattern mirrors real airline operations, where a small percentage of flights drive the majority of total delay minutes.
-# 
-
-# %%
-top10 = clv.head(10)
-
-plt.figure(figsize=(10,6))
-plt.bar(top10["passenger_id"].astype(str), top10["clv_usd"], color="#1f77b4")
-plt.title("Top 10 Customers by CLV")
-plt.xlabel("Passenger ID")
-plt.ylabel("CLV (USD)")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.show()
-
-# %% [markdown]
-# **Top 10 Customers by CLV**  
-# High-value passengers generate a disproportionate share of revenue. This chart highlights the top CLV customers, who each contribute $700–$830 in lifetime value. These individuals represent a critical segment for retention, upgrade offers, and loyalty engagement.
-# 
-
 # %% [markdown]
 # ## Network & Geograaphic Visualizations
 
-# %%
-def get_airports_for_map() -> pd.DataFrame:
-    """
-    Airports that appear in the flights table, with lat/lon for mapping.
-    """
-    sql = """
-    SELECT DISTINCT
-        a.airport_id,
-        a.iata_code,
-        a.name,
-        a.country,
-        a.latitude,
-        a.longitude
-    FROM airports a
-    JOIN flights f
-      ON a.airport_id = f.origin_airport_id
-      OR a.airport_id = f.destination_airport_id
-    WHERE a.latitude IS NOT NULL
-      AND a.longitude IS NOT NULL;
-    """
-    return get_df(sql)
-
-def get_busiest_routes_for_sankey(limit: int = 20) -> pd.DataFrame:
-    """
-    Top N OD pairs by flight count, for Sankey visualization.
-    """
-    sql = """
-    SELECT
-        ao.iata_code AS origin_iata,
-        ad.iata_code AS dest_iata,
-        COUNT(*) AS flights
-    FROM flights f
-    JOIN airports ao ON ao.airport_id = f.origin_airport_id
-    JOIN airports ad ON ad.airport_id = f.destination_airport_id
-    GROUP BY ao.iata_code, ad.iata_code
-    ORDER BY flights DESC
-    LIMIT :limit;
-    """
-    return get_df(sql, {"limit": limit})
-
-def get_route_geometries(limit: int = 50) -> pd.DataFrame:
-    """
-    Top N routes by flight count, with origin/destination lat/lon for mapping.
-    """
-    sql = """
-    SELECT
-        ao.iata_code AS origin_iata,
-        ao.latitude  AS origin_lat,
-        ao.longitude AS origin_lon,
-        ad.iata_code AS dest_iata,
-        ad.latitude  AS dest_lat,
-        ad.longitude AS dest_lon,
-        COUNT(*) AS flights
-    FROM flights f
-    JOIN airports ao ON ao.airport_id = f.origin_airport_id
-    JOIN airports ad ON ad.airport_id = f.destination_airport_id
-    WHERE ao.latitude IS NOT NULL
-      AND ao.longitude IS NOT NULL
-      AND ad.latitude IS NOT NULL
-      AND ad.longitude IS NOT NULL
-    GROUP BY
-        ao.iata_code, ao.latitude, ao.longitude,
-        ad.iata_code, ad.latitude, ad.longitude
-    ORDER BY flights DESC
-    LIMIT :limit;
-    """
-    return get_df(sql, {"limit": limit})
-
 
 
 # %%
-airports_map = get_airports_for_map()
+airports_map = dash.airports_map
 
 plt.figure(figsize=(10, 6))
 plt.scatter(
@@ -623,18 +949,38 @@ plt.tight_layout()
 plt.show()
 
 # %%
-airports_map = get_airports_for_map()
-
-fig = px.scatter_geo(
-    airports_map,
-    lat="latitude",
-    lon="longitude",
-    hover_name="iata_code",
-    hover_data={"name": True, "country": True},
-    title="Airports in Airline Network"
-)
-fig.update_layout(geo=dict(showland=True))
-fig.show()
+# Same frame as the static map above — no second fetch.
+#
+# px.scatter_geo builds one SVG node per airport in the browser, which
+# is fine for a few hundred points but chokes on a full global network.
+# Past the threshold, fall back to a rasterized density map (hexbin on
+# the Agg backend) whose render cost is constant in the point count.
+if len(airports_map) < 500:
+    fig = px.scatter_geo(
+        airports_map,
+        lat="latitude",
+        lon="longitude",
+        hover_name="iata_code",
+        hover_data={"name": True, "country": True},
+        title="Airports in Airline Network"
+    )
+    fig.update_layout(geo=dict(showland=True))
+    fig.show()
+else:
+    plt.figure(figsize=(10, 6))
+    plt.hexbin(
+        airports_map["longitude"],
+        airports_map["latitude"],
+        gridsize=60,
+        cmap="Blues",
+        mincnt=1,
+    )
+    plt.colorbar(label="Airports per cell")
+    plt.title("Airports in Airline Network (Density)")
+    plt.xlabel("Longitude")
+    plt.ylabel("Latitude")
+    plt.tight_layout()
+    plt.show()
 
 
 # %% [markdown]
@@ -645,17 +991,10 @@ fig.show()
 # %%
 import plotly.graph_objects as go
 
-# Data
-busiest_routes = get_busiest_routes_for_sankey(20)
-
-# Build node labels
-labels = sorted(set(busiest_routes["origin_iata"].tolist() + busiest_routes["dest_iata"].tolist()))
-label_to_index = {label: i for i, label in enumerate(labels)}
-
-# Convert to indices
-source_indices = [label_to_index[o] for o in busiest_routes["origin_iata"]]
-target_indices = [label_to_index[d] for d in busiest_routes["dest_iata"]]
-values = busiest_routes["flights"].tolist()
+# Node indices are assigned in SQL (DENSE_RANK over the IATA codes,
+# alphabetical), so labels just need the same alphabetical order.
+sankey_edges = dash.sankey_edges
+labels = sorted(set(sankey_edges["label_src"]) | set(sankey_edges["label_dst"]))
 
 # Build Sankey diagram
 fig = go.Figure(data=[go.Sankey(
@@ -666,9 +1005,9 @@ fig = go.Figure(data=[go.Sankey(
         label=labels
     ),
     link=dict(
-        source=source_indices,
-        target=target_indices,
-        value=values
+        source=sankey_edges["source_idx"],
+        target=sankey_edges["target_idx"],
+        value=sankey_edges["value"]
     )
 )])
 
@@ -682,27 +1021,34 @@ fig.show()
 # 
 
 # %%
-routes_geo = get_route_geometries(50)
-
-plt.figure(figsize=(10, 6))
-
-# Draw each route as a line between airports
-for _, row in routes_geo.iterrows():
-    plt.plot(
-        [row["origin_lon"], row["dest_lon"]],
-        [row["origin_lat"], row["dest_lat"]],
-        linewidth=0.5,
-        alpha=0.5
-    )
+from matplotlib.collections import LineCollection
+
+routes_geo = dash.routes_geo
+
+fig, ax = plt.subplots(figsize=(10, 6))
+
+# One LineCollection artist instead of a Line2D per route: the segment
+# array is (N, 2, 2) sliced straight out of the coordinate columns, so
+# there's no iterrows boxing and matplotlib renders all routes in one
+# draw call.
+segments = np.stack(
+    [
+        routes_geo[["origin_lon", "origin_lat"]].to_numpy(),
+        routes_geo[["dest_lon", "dest_lat"]].to_numpy(),
+    ],
+    axis=1,
+)
+ax.add_collection(LineCollection(segments, linewidths=0.5, alpha=0.5))
+ax.autoscale()
 
 # Overlay airport points
 all_lats = pd.concat([routes_geo["origin_lat"], routes_geo["dest_lat"]])
 all_lons = pd.concat([routes_geo["origin_lon"], routes_geo["dest_lon"]])
 
-plt.scatter(all_lons, all_lats, s=10)
-plt.title("Network Connectivity – Top Routes by Flight Count")
-plt.xlabel("Longitude")
-plt.ylabel("Latitude")
+ax.scatter(all_lons, all_lats, s=10)
+ax.set_title("Network Connectivity – Top Routes by Flight Count")
+ax.set_xlabel("Longitude")
+ax.set_ylabel("Latitude")
 plt.tight_layout()
 plt.show()
 
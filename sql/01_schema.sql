@@ -30,6 +30,14 @@ BEGIN
   IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'miles_txn_type') THEN
     CREATE TYPE miles_txn_type AS ENUM ('EARN','REDEEM','ADJUST');
   END IF;
+
+  IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'fare_class') THEN
+    CREATE TYPE fare_class AS ENUM ('Basic','Standard','Flexible','Business','First');
+  END IF;
+
+  IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'booking_channel') THEN
+    CREATE TYPE booking_channel AS ENUM ('Web','Mobile','Call Center','Travel Agent');
+  END IF;
 END$$;
 
 -- ====== REFERENCE TABLES ======
@@ -113,9 +121,9 @@ CREATE TABLE IF NOT EXISTS bookings (
   passenger_id     BIGINT NOT NULL REFERENCES passengers(passenger_id),
   flight_id        BIGINT NOT NULL REFERENCES flights(flight_id),
   booking_date     TIMESTAMP NOT NULL,
-  fare_class       TEXT,
+  fare_class       fare_class,
   base_price_usd   NUMERIC(10,2) CHECK (base_price_usd >= 0),
-  booking_channel  TEXT,
+  booking_channel  booking_channel,
   CONSTRAINT uq_booking_unique UNIQUE (passenger_id, flight_id)
 );
 
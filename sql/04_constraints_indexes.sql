@@ -472,6 +472,39 @@ CREATE UNIQUE INDEX IF NOT EXISTS uq_bookings_passenger_flight
     ON airline.bookings (passenger_id, flight_id)
     WHERE flight_id IS NOT NULL;
 
+-- bookings: migrate fare_class / booking_channel from TEXT to the
+-- enums defined in 01_schema.sql (no-op on fresh installs). Enums are
+-- 4-byte oids on disk, so group-bys hash an int instead of a
+-- variable-length string and scans move fewer bytes per row.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = 'airline'
+          AND table_name = 'bookings'
+          AND column_name = 'fare_class'
+          AND udt_name = 'text'
+    ) THEN
+        ALTER TABLE airline.bookings
+        ALTER COLUMN fare_class TYPE airline.fare_class
+        USING fare_class::airline.fare_class;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = 'airline'
+          AND table_name = 'bookings'
+          AND column_name = 'booking_channel'
+          AND udt_name = 'text'
+    ) THEN
+        ALTER TABLE airline.bookings
+        ALTER COLUMN booking_channel TYPE airline.booking_channel
+        USING booking_channel::airline.booking_channel;
+    END IF;
+END$$;
+
 ------------------------------------------------------------
 -- 8. PERFORMANCE INDEXES FOR ANALYTICS
 ------------------------------------------------------------
@@ -510,6 +543,42 @@ CREATE INDEX IF NOT EXISTS idx_miles_flight
 CREATE INDEX IF NOT EXISTS idx_fp_year_month_airline_airport
     ON airline.flight_performance (year, month, airline_iata, airport_iata);
 
+-- payments: covering index so the channel success-rate and revenue
+-- aggregations (status test + amount) run as index-only scans with no
+-- heap fetch for amount_usd.
+CREATE INDEX IF NOT EXISTS ix_payments_status_booking
+    ON airline.payments (status, booking_id)
+    INCLUDE (amount_usd);
+
+-- bookings: channel grouping joined to payments by booking_id
+CREATE INDEX IF NOT EXISTS ix_bookings_channel
+    ON airline.bookings (booking_channel, booking_id);
+
+-- Time-series scans: payments and flights are appended in rough date
+-- order, so a BRIN index (a few pages for the whole table) lets the
+-- DATE_TRUNC('month', ...) aggregations skip heap pages outside the
+-- requested range instead of walking a full btree.
+CREATE INDEX IF NOT EXISTS ix_payments_paid_at_brin
+    ON airline.payments USING BRIN (paid_at);
+
+CREATE INDEX IF NOT EXISTS ix_flights_date_brin
+    ON airline.flights USING BRIN (flight_date);
+
+-- Partial btree for the dominant filter: monthly revenue only reads
+-- captured payments, so index just that slice, ordered by paid_at.
+CREATE INDEX IF NOT EXISTS ix_payments_captured
+    ON airline.payments (paid_at)
+    WHERE status = 'Captured';
+
+-- flights: covering index on the route key so the DISTINCT in
+-- etl/backfill_routes_aircraft_changes.py (and the route_id backfill join)
+-- can run as an index-only scan instead of a seq scan + hash aggregate.
+-- Run CLUSTER airline.flights USING ix_flights_route_key during a
+-- maintenance window if you want the heap co-located along this key too.
+CREATE INDEX IF NOT EXISTS ix_flights_route_key
+    ON airline.flights (airline_id, origin_airport_id, destination_airport_id)
+    INCLUDE (flight_id);
+
 ------------------------------------------------------------
 -- 9. QUICK SANITY CHECK (OPTIONAL)
 ------------------------------------------------------------
@@ -0,0 +1,130 @@
+-- 06_materialized_views.sql
+-- Phase 5 support: precomputed aggregates for the analytics notebook
+-- Assumes: schema + constraints in place, ETL loads completed
+--
+-- The notebook helpers re-ran the same group-by scans over bookings /
+-- payments / flights on every cell execution. These materialized views
+-- precompute each aggregation once; the helpers then read O(groups)
+-- rows instead of rescanning the fact tables. Each view gets a UNIQUE
+-- index on its grouping key so REFRESH MATERIALIZED VIEW CONCURRENTLY
+-- works (refresh after ETL via refresh_analytics_views() in
+-- notebooks/04_python_analytics.py).
+
+SET search_path TO airline, public;
+
+------------------------------------------------------------
+-- 1. REVENUE
+------------------------------------------------------------
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS airline.mv_monthly_revenue AS
+SELECT
+    DATE_TRUNC('month', paid_at)::date AS month,
+    SUM(amount_usd) AS revenue_usd
+FROM airline.payments
+WHERE status = 'Captured'
+GROUP BY month;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_monthly_revenue
+    ON airline.mv_monthly_revenue (month);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS airline.mv_revenue_by_fare_class AS
+SELECT
+    b.fare_class,
+    COUNT(*) AS bookings,
+    SUM(p.amount_usd) AS revenue_usd,
+    ROUND(SUM(p.amount_usd) / NULLIF(COUNT(*), 0), 2) AS avg_revenue_per_booking
+FROM airline.bookings b
+JOIN airline.payments p ON p.booking_id = b.booking_id
+WHERE p.status = 'Captured'
+GROUP BY b.fare_class;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_revenue_by_fare_class
+    ON airline.mv_revenue_by_fare_class (fare_class);
+
+------------------------------------------------------------
+-- 2. OPERATIONS
+------------------------------------------------------------
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS airline.mv_airline_punctuality AS
+SELECT
+    airline_iata,
+    SUM(arrivals) AS total_arrivals,
+    SUM(arrivals_delayed_15min) AS delayed_15min,
+    SUM(arr_cancelled) AS cancelled,
+    SUM(arr_diverted) AS diverted,
+    SUM(total_arrival_delay_min) AS total_delay_min,
+    CASE WHEN SUM(arrivals) > 0
+         THEN SUM(total_arrival_delay_min) / SUM(arrivals)
+         ELSE NULL
+    END AS avg_delay_min
+FROM airline.flight_performance
+GROUP BY airline_iata;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_airline_punctuality
+    ON airline.mv_airline_punctuality (airline_iata);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS airline.mv_delay_by_month AS
+SELECT
+    DATE_TRUNC('month', flight_date)::date AS month,
+    ROUND(
+        100.0 * SUM((delay_minutes > 15)::int)
+        / NULLIF(COUNT(*), 0),
+        2
+    ) AS pct_delayed
+FROM airline.flights
+WHERE flight_date IS NOT NULL
+GROUP BY month;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_delay_by_month
+    ON airline.mv_delay_by_month (month);
+
+------------------------------------------------------------
+-- 3. NETWORK
+------------------------------------------------------------
+
+-- Per-airport movement counts live in airport_flight_counts
+-- (08_airport_flight_counts.sql), maintained by triggers on flights —
+-- no refresh step needed, so there is no mv_busiest_airports here.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS airline.mv_busiest_routes AS
+SELECT
+    ao.iata_code AS origin_iata,
+    ad.iata_code AS dest_iata,
+    COUNT(*) AS flights
+FROM airline.flights f
+JOIN airline.airports ao ON ao.airport_id = f.origin_airport_id
+JOIN airline.airports ad ON ad.airport_id = f.destination_airport_id
+GROUP BY ao.iata_code, ad.iata_code;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_busiest_routes
+    ON airline.mv_busiest_routes (origin_iata, dest_iata);
+
+-- Denormalized per-route stats: the worst-routes report previously
+-- joined flights to routes and twice to airports just to resolve IATA
+-- codes that never change. Precomputing here turns it into a single
+-- scan of a narrow table with the codes inlined.
+CREATE MATERIALIZED VIEW IF NOT EXISTS airline.mv_route_stats AS
+SELECT
+    r.route_id,
+    a1.iata_code AS origin_iata,
+    a2.iata_code AS dest_iata,
+    COUNT(*) AS flights,
+    ROUND(AVG(f.delay_minutes), 2) AS avg_delay_min,
+    ROUND(
+        100.0 * SUM((f.status = 'Cancelled')::int)
+        / NULLIF(COUNT(*), 0),
+        2
+    ) AS cancel_rate_pct
+FROM airline.flights f
+JOIN airline.routes r ON r.route_id = f.route_id
+JOIN airline.airports a1 ON a1.airport_id = r.origin_airport_id
+JOIN airline.airports a2 ON a2.airport_id = r.destination_airport_id
+WHERE f.route_id IS NOT NULL
+GROUP BY r.route_id, a1.iata_code, a2.iata_code;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_route_stats
+    ON airline.mv_route_stats (route_id);
+
+-- Top-K "worst" reads become an index range scan
+CREATE INDEX IF NOT EXISTS ix_mv_route_stats_delay
+    ON airline.mv_route_stats (avg_delay_min DESC NULLS LAST);
@@ -0,0 +1,122 @@
+-- 07_passenger_clv.sql
+-- Trigger-maintained per-passenger CLV summary
+-- Assumes: schema + constraints in place
+--
+-- get_clv_samples / get_clv_summary / get_top_pct_revenue_share all
+-- aggregate SUM(amount_usd) per passenger over bookings ⨝ payments —
+-- the heaviest scan in the notebook. This table keeps that sum
+-- incrementally: payments triggers adjust the affected passenger's row
+-- on every insert/update/delete, so CLV reads become an index scan of
+-- one row per passenger instead of a full payments scan + hash agg.
+--
+-- Idempotent: safe to re-run. The seed upsert below recomputes every
+-- row from scratch, which also resyncs the table after loads that ran
+-- with session_replication_role = replica (triggers disabled).
+
+SET search_path TO airline, public;
+
+CREATE TABLE IF NOT EXISTS airline.passenger_clv (
+    passenger_id   BIGINT PRIMARY KEY
+                   REFERENCES airline.passengers(passenger_id) ON DELETE CASCADE,
+    clv_usd        NUMERIC(12,2) NOT NULL DEFAULT 0,
+    last_updated   TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_passenger_clv_usd
+    ON airline.passenger_clv (clv_usd DESC);
+
+------------------------------------------------------------
+-- TRIGGER: keep clv_usd in sync with captured payments
+------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION airline.maintain_passenger_clv()
+RETURNS trigger AS $$
+DECLARE
+    delta NUMERIC(12,2) := 0;
+    pid   BIGINT;
+BEGIN
+    -- Net effect of this row change on captured revenue
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'Captured' THEN
+        delta := delta + NEW.amount_usd;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'Captured' THEN
+        delta := delta - OLD.amount_usd;
+    END IF;
+
+    IF delta = 0 THEN
+        RETURN COALESCE(NEW, OLD);
+    END IF;
+
+    SELECT passenger_id INTO pid
+    FROM airline.bookings
+    WHERE booking_id = COALESCE(NEW.booking_id, OLD.booking_id);
+
+    -- payments.booking_id is ON DELETE CASCADE: when a booking is
+    -- deleted the parent row is already gone by the time the cascade
+    -- fires this trigger. The decrement for that case is applied by
+    -- trg_clv_booking_delete below, so just bail out here.
+    IF pid IS NULL THEN
+        RETURN COALESCE(NEW, OLD);
+    END IF;
+
+    INSERT INTO airline.passenger_clv (passenger_id, clv_usd, last_updated)
+    VALUES (pid, delta, NOW())
+    ON CONFLICT (passenger_id)
+    DO UPDATE SET clv_usd = passenger_clv.clv_usd + EXCLUDED.clv_usd,
+                  last_updated = NOW();
+
+    RETURN COALESCE(NEW, OLD);
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_maintain_passenger_clv ON airline.payments;
+CREATE TRIGGER trg_maintain_passenger_clv
+AFTER INSERT OR UPDATE OR DELETE ON airline.payments
+FOR EACH ROW EXECUTE FUNCTION airline.maintain_passenger_clv();
+
+------------------------------------------------------------
+-- TRIGGER: settle CLV before a booking cascade-deletes its payments
+------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION airline.clv_booking_delete()
+RETURNS trigger AS $$
+DECLARE
+    delta NUMERIC(12,2);
+BEGIN
+    -- BEFORE DELETE so the booking's payments still exist; the cascade
+    -- then removes them with the payments-level trigger skipping (its
+    -- bookings lookup comes back NULL).
+    SELECT COALESCE(SUM(amount_usd), 0) INTO delta
+    FROM airline.payments
+    WHERE booking_id = OLD.booking_id
+      AND status = 'Captured';
+
+    IF delta <> 0 THEN
+        UPDATE airline.passenger_clv
+        SET clv_usd = clv_usd - delta,
+            last_updated = NOW()
+        WHERE passenger_id = OLD.passenger_id;
+    END IF;
+
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_clv_booking_delete ON airline.bookings;
+CREATE TRIGGER trg_clv_booking_delete
+BEFORE DELETE ON airline.bookings
+FOR EACH ROW EXECUTE FUNCTION airline.clv_booking_delete();
+
+------------------------------------------------------------
+-- SEED / RESYNC: full recompute from the fact tables
+------------------------------------------------------------
+
+INSERT INTO airline.passenger_clv (passenger_id, clv_usd, last_updated)
+SELECT b.passenger_id, SUM(p.amount_usd), NOW()
+FROM airline.bookings b
+JOIN airline.payments p ON p.booking_id = b.booking_id
+WHERE p.status = 'Captured'
+GROUP BY b.passenger_id
+ON CONFLICT (passenger_id)
+DO UPDATE SET clv_usd = EXCLUDED.clv_usd,
+              last_updated = EXCLUDED.last_updated;
@@ -0,0 +1,78 @@
+-- 08_airport_flight_counts.sql
+-- Trigger-maintained per-airport movement counters
+-- Assumes: schema + constraints in place
+--
+-- Replaces mv_busiest_airports: instead of a view that rescans flights
+-- on every REFRESH, flights triggers bump the two affected airports'
+-- counters on each insert/delete, so get_busiest_airports becomes an
+-- ORDER BY cnt DESC LIMIT k index range scan with no refresh step.
+--
+-- Idempotent: safe to re-run. The seed upsert recomputes every counter
+-- from flights, which also resyncs after loads that ran with
+-- session_replication_role = replica (triggers disabled).
+
+SET search_path TO airline, public;
+
+CREATE TABLE IF NOT EXISTS airline.airport_flight_counts (
+    airport_id   BIGINT PRIMARY KEY
+                 REFERENCES airline.airports(airport_id) ON DELETE CASCADE,
+    cnt          BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS ix_afc_cnt
+    ON airline.airport_flight_counts (cnt DESC);
+
+------------------------------------------------------------
+-- TRIGGER: bump both endpoints on every flight change
+------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION airline.maintain_airport_flight_counts()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        -- Aggregate before the upsert: flights has no CHECK against
+        -- origin = destination, and ON CONFLICT DO UPDATE cannot touch
+        -- the same target row twice in one statement.
+        INSERT INTO airline.airport_flight_counts (airport_id, cnt)
+        SELECT airport_id, COUNT(*)
+        FROM (VALUES (NEW.origin_airport_id),
+                     (NEW.destination_airport_id)) endpoints(airport_id)
+        GROUP BY airport_id
+        ON CONFLICT (airport_id)
+        DO UPDATE SET cnt = airport_flight_counts.cnt + EXCLUDED.cnt;
+        RETURN NEW;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE airline.airport_flight_counts c
+        SET cnt = c.cnt - endpoints.n
+        FROM (
+            SELECT airport_id, COUNT(*) AS n
+            FROM (VALUES (OLD.origin_airport_id),
+                         (OLD.destination_airport_id)) e(airport_id)
+            GROUP BY airport_id
+        ) endpoints
+        WHERE c.airport_id = endpoints.airport_id;
+        RETURN OLD;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_maintain_airport_flight_counts ON airline.flights;
+CREATE TRIGGER trg_maintain_airport_flight_counts
+AFTER INSERT OR DELETE ON airline.flights
+FOR EACH ROW EXECUTE FUNCTION airline.maintain_airport_flight_counts();
+
+------------------------------------------------------------
+-- SEED / RESYNC: full recompute from flights
+------------------------------------------------------------
+
+INSERT INTO airline.airport_flight_counts (airport_id, cnt)
+SELECT airport_id, COUNT(*)
+FROM (
+    SELECT origin_airport_id AS airport_id FROM airline.flights
+    UNION ALL
+    SELECT destination_airport_id FROM airline.flights
+) movements
+GROUP BY airport_id
+ON CONFLICT (airport_id)
+DO UPDATE SET cnt = EXCLUDED.cnt;
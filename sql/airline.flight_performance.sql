@@ -3,7 +3,7 @@ SET search_path TO airline, public;
 
 -- Create table inside airline schema
 CREATE TABLE airline.flight_performance (
-    snapshot_id TEXT PRIMARY KEY,                       -- e.g., 2024_01_MQ_EWR
+    snapshot_id BIGINT PRIMARY KEY,                     -- 64-bit hash of year-month-airline-airport
     year INT NOT NULL,
     month INT NOT NULL,
     airline_iata VARCHAR(5) NOT NULL,
@@ -28,5 +28,27 @@ CREATE INDEX IF NOT EXISTS idx_fp_month ON airline.flight_performance (year, mon
 CREATE INDEX IF NOT EXISTS idx_fp_airline ON airline.flight_performance (airline_iata);
 CREATE INDEX IF NOT EXISTS idx_fp_airport ON airline.flight_performance (airport_iata);
 
+-- Migrate pre-BIGINT deployments: snapshot_id used to hold the TEXT
+-- natural key 'YYYY-MM-AIRLINE-AIRPORT'. Rehash the existing keys in
+-- place so the PK index shrinks to 8 bytes (no-op on fresh installs).
+-- The hashes won't match the ids the loader computes for the same
+-- natural keys, which is fine: its upsert arbitrates on uq_fp, so
+-- re-runs stay idempotent regardless of key format.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = 'airline'
+          AND table_name = 'flight_performance'
+          AND column_name = 'snapshot_id'
+          AND udt_name IN ('text', 'varchar')
+    ) THEN
+        ALTER TABLE airline.flight_performance
+        ALTER COLUMN snapshot_id TYPE BIGINT
+        USING hashtextextended(snapshot_id, 0);
+    END IF;
+END $$;
+
 
 